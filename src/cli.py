@@ -0,0 +1,180 @@
+"""コマンドラインエントリポイント.
+
+pyproject.toml の [project.scripts] から呼び出される。
+- speed-tracker-run: 1回の速度計測を行い、結果をデータベースに保存する
+- speed-tracker-report: ヒートマップ + 折れ線グラフの複合画像を生成する
+
+パッケージとしてインストールしておけば、cron からも sys.path の操作なしで実行できる。
+scripts/ 配下のスクリプトはこのモジュールを呼び出す薄いラッパーである。
+"""
+
+from __future__ import annotations
+
+import sys
+import argparse
+import logging
+
+from src.config import PROJECT_ROOT, load_config
+from src.collector import run_speedtest, SpeedtestError
+from src.scoring import calculate_comfort_score
+from src.storage import init_db, save_measurement, save_error
+
+
+def _setup_logging() -> None:
+    """ロギングを設定する.
+
+    コンソール出力と logs/collector.log への追記を行う。
+    """
+    log_dir = PROJECT_ROOT / "logs"
+    log_dir.mkdir(exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler(log_dir / "collector.log", encoding="utf-8"),
+        ],
+    )
+
+
+def run_speedtest_main() -> None:
+    """計測処理: 速度計測 → スコア算出 → DB 保存.
+
+    失敗時（再試行全失敗後）はエラーを記録して終了コード 1 で終了する。
+    """
+    _setup_logging()
+    logger = logging.getLogger(__name__)
+    logger.info("=== 速度計測を開始する ===")
+
+    config = load_config()
+
+    # データベースを初期化する（テーブルが存在しない場合のみ作成）
+    init_db(config=config)
+
+    try:
+        # Speedtest CLI を実行する
+        result = run_speedtest(config=config)
+
+        # bytes/sec → Mbps に変換する
+        download_mbps = result["download_bps"] / 1_000_000
+        upload_mbps = result["upload_bps"] / 1_000_000
+
+        logger.info(
+            "計測結果: DL=%.2f Mbps, UL=%.2f Mbps, Ping=%.1f ms, Jitter=%.1f ms",
+            download_mbps,
+            upload_mbps,
+            result["ping_ms"],
+            result["jitter_ms"],
+        )
+
+        # 快適度スコアを算出する
+        comfort_score = calculate_comfort_score(
+            download_mbps=download_mbps,
+            upload_mbps=upload_mbps,
+            ping_ms=result["ping_ms"],
+            jitter_ms=result["jitter_ms"],
+            config=config,
+        )
+        logger.info("快適度スコア: %.1f", comfort_score)
+
+        # データベースに保存する
+        measurement_data = {
+            "measured_at": result["timestamp"],
+            "measured_at_ts": result["timestamp_ts"],
+            "download_mbps": download_mbps,
+            "upload_mbps": upload_mbps,
+            "ping_ms": result["ping_ms"],
+            "jitter_ms": result["jitter_ms"],
+            "comfort_score": comfort_score,
+            "server_id": result.get("server_id"),
+            "server_name": result.get("server_name"),
+            "isp": result.get("isp"),
+            "result_url": result.get("result_url"),
+            "raw_json": result.get("raw_json"),
+        }
+        row_id = save_measurement(measurement_data, config=config)
+        logger.info("計測結果を保存した (id=%d)", row_id)
+
+    except SpeedtestError as e:
+        # 計測失敗をエラーとして記録する
+        logger.error("計測に失敗した: %s", e)
+        error_id = save_error(str(e), config=config)
+        logger.info("エラーを記録した (id=%d)", error_id)
+        sys.exit(1)
+
+    except Exception as e:
+        # 予期しないエラー
+        logger.exception("予期しないエラーが発生した: %s", e)
+        try:
+            save_error(f"予期しないエラー: {e}", config=config)
+        except Exception:
+            logger.exception("エラーの記録にも失敗した")
+        sys.exit(2)
+
+    logger.info("=== 速度計測が完了した ===")
+
+
+def parse_report_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """レポート生成のコマンドライン引数をパースする.
+
+    Args:
+        argv: 引数リスト（省略時は sys.argv[1:]）
+
+    Returns:
+        パース結果の Namespace オブジェクト
+    """
+    parser = argparse.ArgumentParser(
+        description="Speed Tracker レポート画像を生成する"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=28,
+        help="ヒートマップの集計対象日数（デフォルト: 28）",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="出力ファイルパス（省略時: granularity に応じた自動命名）",
+    )
+    parser.add_argument(
+        "--granularity",
+        choices=["daily", "hourly"],
+        default="hourly",
+        help="デフォルト出力名の粒度（デフォルト: hourly）",
+    )
+    return parser.parse_args(argv)
+
+
+def report_main() -> None:
+    """レポート生成処理: レポート画像を生成する."""
+    _setup_logging()
+    logger = logging.getLogger(__name__)
+    logger.info("=== レポート生成を開始する ===")
+
+    args = parse_report_args()
+    # matplotlib を読み込むため、計測側（run_speedtest_main）とは分けて遅延インポートする
+    # 引数の解析後に読み込み、--help や引数エラーでは読み込みを待たずに終了する
+    from src.visualizer import generate_heatmap
+
+    config = load_config()
+
+    # データベースを初期化する（テーブルが存在しない場合のみ作成）
+    init_db(config=config)
+
+    try:
+        # サマリは generate_heatmap 内で、ヒートマップ用に取得した集計結果から生成する
+        output_path = generate_heatmap(
+            output_path=args.output,
+            days=args.days,
+            filename_granularity=args.granularity,
+            config=config,
+        )
+        logger.info("レポート画像を生成した: %s", output_path)
+    except Exception as e:
+        logger.exception("レポート生成に失敗した: %s", e)
+        sys.exit(1)
+
+    logger.info("=== レポート生成が完了した ===")
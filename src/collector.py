@@ -7,12 +7,13 @@ JSON 出力をパースして計測結果を返す。
 
 from __future__ import annotations
 
-import json
 import time
 import logging
 import shutil
 import subprocess
-from datetime import datetime
+from datetime import datetime, timezone
+
+import orjson
 
 from src.config import load_config
 
@@ -61,7 +62,39 @@ def _resolve_speedtest_command(command: str) -> str:
     return command
 
 
-def _parse_result(raw_json: str) -> dict:
+def _normalize_timestamp(value: str | None) -> datetime:
+    """Speedtest CLI の timestamp を UTC の aware datetime に正規化する.
+
+    Ookla CLI は UTC の `...Z` 形式で返す。欠落時や解釈できない場合は
+    現在時刻（UTC）で代用する。タイムゾーンなしの値は UTC とみなす。
+
+    Args:
+        value: timestamp 文字列（省略可）
+
+    Returns:
+        UTC の aware datetime
+    """
+    if value is None:
+        return datetime.now(timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        logger.warning("timestamp を解釈できないため現在時刻を使用する: %r", value)
+        return datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _dig(data: dict, section: str, key: str):
+    """data[section][key] を取り出す. 途中が欠落・辞書でない場合は None を返す."""
+    value = data.get(section)
+    if not isinstance(value, dict):
+        return None
+    return value.get(key)
+
+
+def _parse_result(raw_json: str | bytes) -> dict:
     """Speedtest CLI の JSON 出力をパースし、必要なフィールドを抽出する.
 
     Ookla CLI の出力形式:
@@ -75,37 +108,94 @@ def _parse_result(raw_json: str) -> dict:
         "result": {"url": "https://..."}
     }
 
+    JSON のパースのみを行い、フィールドの抽出は _parse_obj() に任せる。
+
     Args:
-        raw_json: Speedtest CLI の JSON 出力文字列
+        raw_json: Speedtest CLI の JSON 出力（文字列またはバイト列）
 
     Returns:
-        パース済みの辞書
+        パース済みの辞書（raw_json には元の JSON 文字列を格納する）
 
     Raises:
         SpeedtestParseError: JSON パースまたは必須フィールドの欠落時
     """
     try:
-        data = json.loads(raw_json)
-    except json.JSONDecodeError as e:
+        # 標準 json より高速な orjson でパースする
+        # orjson.JSONDecodeError は json.JSONDecodeError のサブクラスである
+        data = orjson.loads(raw_json)
+    except orjson.JSONDecodeError as e:
         raise SpeedtestParseError(f"JSON パースに失敗した: {e}") from e
 
-    try:
-        result = {
-            "timestamp": data.get("timestamp", datetime.utcnow().isoformat()),
-            # bandwidth は bytes/sec なので bits/sec に変換し、さらに Mbps にする
-            # Ookla CLI は bandwidth を bytes/sec で返す
-            "download_bps": data["download"]["bandwidth"] * 8,
-            "upload_bps": data["upload"]["bandwidth"] * 8,
-            "ping_ms": data["ping"]["latency"],
-            "jitter_ms": data["ping"]["jitter"],
-            "server_id": data.get("server", {}).get("id"),
-            "server_name": data.get("server", {}).get("name"),
-            "isp": data.get("isp"),
-            "result_url": data.get("result", {}).get("url"),
-            "raw_json": raw_json,
-        }
-    except (KeyError, TypeError) as e:
-        raise SpeedtestParseError(f"必須フィールドが欠落している: {e}") from e
+    result = _parse_obj(data)
+    if isinstance(raw_json, bytes):
+        # orjson が UTF-8 として検証済みのため、ここでの decode は失敗しない
+        raw_json = raw_json.decode("utf-8")
+    result["raw_json"] = raw_json
+    return result
+
+
+def _parse_obj(data: object) -> dict:
+    """パース済みの Speedtest CLI の出力から必要なフィールドを抽出する.
+
+    timestamp は RFC 3339 の UTC 表記（`YYYY-MM-DDTHH:MM:SSZ`）に正規化し、
+    UNIX 時刻（秒）を timestamp_ts として併せて返す。
+    保存側で日時文字列を再パースせずに済むようにするためである。
+
+    Args:
+        data: JSON をパースしたオブジェクト
+
+    Returns:
+        パース済みの辞書（元の JSON 文字列を持たないため raw_json は None）
+
+    Raises:
+        SpeedtestParseError: トップレベルがオブジェクトでない、または必須フィールドの欠落・型不正時
+    """
+    if not isinstance(data, dict):
+        raise SpeedtestParseError(
+            f"JSON のトップレベルがオブジェクトではない: {type(data).__name__}"
+        )
+
+    # 必須フィールドは例外に頼らず取り出し、欠落をまとめて報告する
+    download_bandwidth = _dig(data, "download", "bandwidth")
+    upload_bandwidth = _dig(data, "upload", "bandwidth")
+    ping_latency = _dig(data, "ping", "latency")
+    ping_jitter = _dig(data, "ping", "jitter")
+    required = {
+        "download.bandwidth": download_bandwidth,
+        "upload.bandwidth": upload_bandwidth,
+        "ping.latency": ping_latency,
+        "ping.jitter": ping_jitter,
+    }
+    missing = [name for name, value in required.items() if value is None]
+    if missing:
+        raise SpeedtestParseError(f"必須フィールドが欠落している: {', '.join(missing)}")
+    # 文字列のまま計算すると "abc" * 8 のように黙って繰り返されるため、数値であることを確認する
+    # bool は int のサブクラスだが計測値ではないため除外する
+    non_numeric = [
+        name
+        for name, value in required.items()
+        if isinstance(value, bool) or not isinstance(value, (int, float))
+    ]
+    if non_numeric:
+        raise SpeedtestParseError(f"必須フィールドが数値ではない: {', '.join(non_numeric)}")
+
+    measured = _normalize_timestamp(data.get("timestamp"))
+
+    result = {
+        "timestamp": measured.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "timestamp_ts": int(measured.timestamp()),
+        # bandwidth は bytes/sec なので bits/sec に変換し、さらに Mbps にする
+        # Ookla CLI は bandwidth を bytes/sec で返す
+        "download_bps": download_bandwidth * 8,
+        "upload_bps": upload_bandwidth * 8,
+        "ping_ms": ping_latency,
+        "jitter_ms": ping_jitter,
+        "server_id": _dig(data, "server", "id"),
+        "server_name": _dig(data, "server", "name"),
+        "isp": data.get("isp"),
+        "result_url": _dig(data, "result", "url"),
+        "raw_json": None,
+    }
 
     logger.debug(
         "パース結果: DL=%.0f bps, UL=%.0f bps, Ping=%.1f ms, Jitter=%.1f ms",
@@ -155,16 +245,18 @@ def run_speedtest(config: dict | None = None) -> dict:
         logger.info("計測試行 %d/%d", attempt, retry_count)
         try:
             # subprocess で CLI を実行する
+            # 出力はバイト列のまま受け取り、orjson に直接渡す（テキスト変換を省く）
             proc = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
+                text=False,
                 timeout=timeout,
             )
 
             # 非ゼロ終了コードの場合
             if proc.returncode != 0:
-                error_msg = proc.stderr.strip() or f"終了コード: {proc.returncode}"
+                stderr = proc.stderr.decode("utf-8", errors="replace").strip()
+                error_msg = stderr or f"終了コード: {proc.returncode}"
                 if "HostNotFoundException" in error_msg:
                     error_msg = (
                         "DNS解決に失敗した可能性がある。"
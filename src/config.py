@@ -2,20 +2,26 @@
 
 環境変数 ST_CONFIG_PATH でパスをオーバーライドできる。
 ファイルが存在しない場合はデフォルト値を返す。
+読み込み結果はプロセス内でキャッシュされる（reload_config() で破棄できる）。
 """
 
 from __future__ import annotations
 
 import os
 import logging
+import functools
 from pathlib import Path
-from copy import deepcopy
 
 import yaml
 
 logger = logging.getLogger(__name__)
 
+# libyaml が利用できる場合は C 実装のローダーを使う（純 Python 版より数倍速い）
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # プロジェクトルートディレクトリ（src/ の親）
+# config.yaml・data/・assets/ はチェックアウト内に置くため、`uv pip install -e .` による
+# 編集可能インストールのみをサポートする（site-packages にコピーすると解決できない）
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
 # デフォルト設定値
@@ -68,6 +74,26 @@ DEFAULT_CONFIG: dict = {
 }
 
 
+def _clone(value):
+    """設定値を複製する（deepcopy の軽量版）.
+
+    設定値は YAML 由来の dict / list / スカラのみで構成されるため、
+    dict と list だけを再帰的に複製し、不変なスカラ（int, float, str,
+    bool, None）はそのまま共有する。
+
+    Args:
+        value: 複製する値
+
+    Returns:
+        複製された値
+    """
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
 def _deep_merge(base: dict, override: dict) -> dict:
     """base の辞書に override を再帰的にマージする.
 
@@ -81,13 +107,13 @@ def _deep_merge(base: dict, override: dict) -> dict:
     Returns:
         マージされた新しい辞書
     """
-    merged = deepcopy(base)
+    merged = _clone(base)
     for key, value in override.items():
         if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
             # 両方が辞書の場合は再帰的にマージ
             merged[key] = _deep_merge(merged[key], value)
         else:
-            merged[key] = deepcopy(value)
+            merged[key] = _clone(value)
     return merged
 
 
@@ -101,8 +127,42 @@ def load_config(path: str | None = None) -> dict:
 
     ファイルが存在しない場合はデフォルト値のみを返す。
 
+    結果は (path, ST_CONFIG_PATH) の組でキャッシュされ、同一プロセス内の
+    2回目以降の呼び出しでは YAML の再パース・マージを行わない。
+    戻り値の辞書は呼び出し元間で共有されるため、変更してはならない。
+    値を書き換えたい場合は copy.deepcopy() で複製してから使うこと。
+
+    Args:
+        path: 設定ファイルのパス（省略可）
+
+    Returns:
+        マージ済みの設定辞書（共有オブジェクト）
+    """
+    return _load_config_cached(path, os.environ.get("ST_CONFIG_PATH"))
+
+
+def reload_config(path: str | None = None) -> dict:
+    """設定のキャッシュを破棄して再読み込みする.
+
+    config.yaml や環境変数を実行中に変更した場合（主にテスト）に使う。
+
+    Args:
+        path: 設定ファイルのパス（省略可）
+
+    Returns:
+        再読み込みした設定辞書
+    """
+    _load_config_cached.cache_clear()
+    return load_config(path)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path: str | None, env_path: str | None) -> dict:
+    """load_config() の実体. 引数の組ごとに結果をキャッシュする.
+
     Args:
         path: 設定ファイルのパス（省略可）
+        env_path: 環境変数 ST_CONFIG_PATH の値（キャッシュキー用）
 
     Returns:
         マージ済みの設定辞書
@@ -110,8 +170,8 @@ def load_config(path: str | None = None) -> dict:
     # 設定ファイルパスの決定
     if path is not None:
         config_path = Path(path)
-    elif os.environ.get("ST_CONFIG_PATH"):
-        config_path = Path(os.environ["ST_CONFIG_PATH"])
+    elif env_path:
+        config_path = Path(env_path)
     else:
         config_path = PROJECT_ROOT / "config.yaml"
 
@@ -119,14 +179,16 @@ def load_config(path: str | None = None) -> dict:
     if config_path.exists():
         logger.info("設定ファイルを読み込む: %s", config_path)
         with open(config_path, "r", encoding="utf-8") as f:
-            user_config = yaml.safe_load(f) or {}
+            user_config = yaml.load(f, Loader=_YAML_LOADER) or {}
         # デフォルト値とマージ
-        return _deep_merge(DEFAULT_CONFIG, user_config)
+        config = _deep_merge(DEFAULT_CONFIG, user_config)
     else:
         logger.warning(
             "設定ファイルが見つからない: %s — デフォルト値を使用する", config_path
         )
-        return deepcopy(DEFAULT_CONFIG)
+        config = _clone(DEFAULT_CONFIG)
+
+    return config
 
 
 def get_db_path(config: dict | None = None) -> Path:
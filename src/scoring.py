@@ -6,11 +6,51 @@
 実データ蓄積後の再調整が容易である。
 """
 
+import bisect
 import logging
+from typing import NamedTuple
 
 logger = logging.getLogger(__name__)
 
 
+class _LabelTable(NamedTuple):
+    """scoring.labels を min の昇順に並べ、二分探索できる形にした値の組."""
+
+    mins: tuple
+    names: tuple
+
+
+# 直近に構築した _LabelTable と、構築に使った labels の複製
+# labels だけを参照するため、weights / thresholds を持たない scoring セクションでも使える
+_LABEL_CACHE: tuple | None = None
+
+
+def _get_label_table(labels: list[dict]) -> _LabelTable:
+    """scoring.labels に対応する _LabelTable を返す.
+
+    前回と同じ値の labels であれば構築済みの値を再利用し、
+    呼び出しごとの並べ替えを省く。
+
+    Args:
+        labels: 設定辞書の scoring.labels
+
+    Returns:
+        _LabelTable
+    """
+    global _LABEL_CACHE
+    cached = _LABEL_CACHE
+    if cached is not None and cached[0] == labels:
+        return cached[1]
+    # 二分探索できるよう、min の昇順に並べておく
+    labels_sorted = sorted(labels, key=lambda entry: entry["min"])
+    table = _LabelTable(
+        mins=tuple(entry["min"] for entry in labels_sorted),
+        names=tuple(entry["label"] for entry in labels_sorted),
+    )
+    _LABEL_CACHE = ([dict(entry) for entry in labels], table)
+    return table
+
+
 def calculate_comfort_score(
     download_mbps: float,
     upload_mbps: float,
@@ -74,6 +114,56 @@ def calculate_comfort_score(
     return round(score, 1)
 
 
+def calculate_comfort_scores_batch(
+    download_mbps,
+    upload_mbps,
+    ping_ms,
+    jitter_ms,
+    config: dict,
+):
+    """複数の計測値の快適度スコアをまとめて算出する（0〜100）.
+
+    calculate_comfort_score と同じ正規化・重み付けを NumPy 配列に対して
+    一括で行う。過去データの再スコアリングなど、大量の行を処理する用途向け。
+    NumPy は呼び出し時に読み込む（計測スクリプトの起動を重くしないため）。
+
+    Args:
+        download_mbps: ダウンロード速度（Mbps）の配列
+        upload_mbps: アップロード速度（Mbps）の配列
+        ping_ms: レイテンシ（ms）の配列
+        jitter_ms: ジッター（ms）の配列
+        config: 設定辞書（scoring セクションを含む）
+
+    Returns:
+        快適度スコアの numpy.ndarray（小数第1位に丸めた float64）
+    """
+    import numpy as np
+
+    scoring_config = config["scoring"]
+    weights = scoring_config["weights"]
+    thresholds = scoring_config["thresholds"]
+
+    download = np.asarray(download_mbps, dtype=np.float64)
+    upload = np.asarray(upload_mbps, dtype=np.float64)
+    ping = np.asarray(ping_ms, dtype=np.float64)
+    jitter = np.asarray(jitter_ms, dtype=np.float64)
+
+    # スカラ版と同じく、上限または下限のみをクリップする
+    download_score = np.minimum(download / thresholds["download_max_mbps"], 1.0)
+    upload_score = np.minimum(upload / thresholds["upload_max_mbps"], 1.0)
+    ping_score = np.maximum(1.0 - ping / thresholds["ping_max_ms"], 0.0)
+    jitter_score = np.maximum(1.0 - jitter / thresholds["jitter_max_ms"], 0.0)
+
+    scores = (
+        weights["download"] * download_score
+        + weights["upload"] * upload_score
+        + weights["ping"] * ping_score
+        + weights["jitter"] * jitter_score
+    ) * 100
+
+    return np.round(np.clip(scores, 0.0, 100.0), 1)
+
+
 def get_comfort_label(score: float, config: dict) -> str:
     """快適度スコアからラベル文字列を返す.
 
@@ -87,17 +177,16 @@ def get_comfort_label(score: float, config: dict) -> str:
     Returns:
         ラベル文字列（例: "非常に快適"、"快適"、"やや不安定"、"不快"）
     """
-    labels = config["scoring"]["labels"]
+    table = _get_label_table(config["scoring"]["labels"])
 
     # 設定外の値が来ても扱えるように 0-100 に丸める
     normalized = max(0.0, min(100.0, score))
 
-    # 小数境界の隙間を避けるため、min の降順で最初に一致したラベルを採用する
+    # 小数境界の隙間を避けるため、min が score 以下のうち最大のラベルを採用する
     # 例: 89.9 は min=70 の「快適」に分類される
-    sorted_labels = sorted(labels, key=lambda entry: entry["min"], reverse=True)
-    for entry in sorted_labels:
-        if normalized >= entry["min"]:
-            return entry["label"]
+    index = bisect.bisect_right(table.mins, normalized) - 1
+    if index >= 0:
+        return table.names[index]
 
     # labels が空、または min 設定が不正な場合のフォールバック
     logger.warning("スコア %.1f に対応するラベルが見つからない", score)
@@ -1,25 +1,48 @@
 """SQLite によるデータ保存・集計モジュール.
 
 計測結果の保存、時間帯別集計、古いデータの削除を行う。
-テーブルは measurements の単一テーブル構成である。
+テーブルは計測結果の measurements と、生 JSON を分離して保持する
+measurements_raw の2テーブル構成である。
+接続はスレッドごと・DB パスごとにキャッシュして使い回す。
+db_path には `file:` で始まる SQLite の URI 文字列も指定できる
+（例: `file:test?mode=memory&cache=shared` でインメモリ DB を使う）。
 """
 
 from __future__ import annotations
 
+import atexit
 import sqlite3
 import logging
+import threading
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from src.config import load_config, get_db_path
 
 logger = logging.getLogger(__name__)
 
-# テーブル作成 SQL
+# スレッドごとの接続キャッシュ（DB パス文字列 → sqlite3.Connection）
+# sqlite3.Connection は作成したスレッド以外から使えないため threading.local で分ける
+_local = threading.local()
+
+# UTC の日時を measured_at などの文字列に書き出す形式
+# collector が保存する measured_at（Speedtest の timestamp）と同じ末尾 Z の表記に揃え、
+# `+00:00` 表記と混在して文字列比較の結果が書き込み元によって変わらないようにする
+_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# スキーマバージョン（PRAGMA user_version に記録し、既存 DB の移行判定に使う）
+# 1: measured_at_ts 列を追加
+# 2: raw_json を measurements_raw テーブルへ分離
+_SCHEMA_VERSION = 2
+
+# テーブル作成 SQL（最新バージョンのスキーマ）
+# measured_at は可読性のため ISO 8601 文字列のまま残し、
+# 集計では UNIX 時刻（秒）の measured_at_ts を整数演算で使う
 _CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS measurements (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     measured_at     TEXT NOT NULL,
+    measured_at_ts  INTEGER,
     status          TEXT NOT NULL DEFAULT 'ok',
     download_mbps   REAL,
     upload_mbps     REAL,
@@ -31,69 +54,283 @@ CREATE TABLE IF NOT EXISTS measurements (
     isp             TEXT,
     result_url      TEXT,
     error_message   TEXT,
-    raw_json        TEXT,
     created_at      TEXT NOT NULL DEFAULT (datetime('now'))
 );
 """
 
+# 生 JSON テーブル作成 SQL
+# 数 KB ある raw_json を別テーブルに置き、集計時に走査する measurements の行を小さく保つ
+# 親行の削除時はカスケード削除する（接続ごとに PRAGMA foreign_keys=ON が必要）
+_CREATE_RAW_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS measurements_raw (
+    id              INTEGER PRIMARY KEY REFERENCES measurements(id) ON DELETE CASCADE,
+    raw_json        TEXT NOT NULL
+);
+"""
+
 # インデックス作成 SQL
 _CREATE_INDEXES_SQL = [
+    # 保存期間の削除（status を問わない WHERE measured_at_ts < ?）用のインデックス
     """
-    CREATE INDEX IF NOT EXISTS idx_measurements_measured_at
-        ON measurements(measured_at);
+    CREATE INDEX IF NOT EXISTS idx_measurements_ts
+        ON measurements(measured_at_ts);
     """,
+    # 集計・直近取得の WHERE status = 'ok' AND measured_at_ts >= ? 用の複合インデックス
+    # comfort_score も含めるため、時間帯別集計はテーブル本体を読まずに済む（カバリングインデックス）
     """
-    CREATE INDEX IF NOT EXISTS idx_measurements_status
-        ON measurements(status);
+    CREATE INDEX IF NOT EXISTS idx_measurements_status_ts
+        ON measurements(status, measured_at_ts, comfort_score);
     """,
 ]
 
+# 廃止したインデックス（既存 DB から削除する）
+# - idx_measurements_status: idx_measurements_status_ts の先頭列で代替できる
+# - idx_measurements_status_time: measured_at_ts 版の idx_measurements_status_ts に置き換えた
+# - idx_measurements_measured_at: 期間の絞り込みを measured_at_ts で行うようにし、idx_measurements_ts に置き換えた
+_OBSOLETE_INDEXES = [
+    "idx_measurements_status",
+    "idx_measurements_status_time",
+    "idx_measurements_measured_at",
+]
+
+# 計測結果の INSERT SQL（単発保存・一括保存で共用する）
+_INSERT_MEASUREMENT_SQL = """
+INSERT INTO measurements (
+    measured_at, measured_at_ts, status, download_mbps, upload_mbps,
+    ping_ms, jitter_ms, comfort_score,
+    server_id, server_name, isp, result_url
+) VALUES (?, ?, 'ok', ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 生 JSON の INSERT SQL
+_INSERT_RAW_SQL = "INSERT INTO measurements_raw (id, raw_json) VALUES (?, ?)"
+
+# 直近の計測結果の取得列と SQL
+# 行はタプルで受け取り、この列名と zip して辞書にする
+_RECENT_COLUMNS = (
+    "measured_at",
+    "download_mbps",
+    "upload_mbps",
+    "ping_ms",
+    "jitter_ms",
+    "comfort_score",
+)
+# 期間は measured_at_ts（UTC の UNIX 時刻）で絞り込み、並べ替える
+# （idx_measurements_status_ts を使い、measured_at の表記の違いにも左右されない）
+_RECENT_MEASUREMENTS_SQL = f"""
+SELECT {", ".join(_RECENT_COLUMNS)}
+FROM measurements
+WHERE status = 'ok'
+  AND measured_at_ts >= ?
+ORDER BY measured_at_ts ASC
+"""
+
+# 時間帯×曜日の平均スコア集計 SQL
+# SQL 文字列を固定し、値はすべて名前付きパラメータで渡す。
+# 同一接続では sqlite3 のプリペアドステートメントキャッシュが効き、
+# 2回目以降の呼び出しで SQL の再コンパイルが発生しない。
+# measured_at_ts（UTC の UNIX 時刻）にオフセットを足してカフェのローカル時刻にし、
+# 曜日と時間帯を整数演算で求めて集計する（行ごとの文字列パースが不要）
+# - 時間帯: (local_ts / 3600) % 24
+# - 曜日: 1970-01-01 は木曜（Python weekday で 3）なので (local_ts / 86400 + 3) % 7
+_HOURLY_AVERAGES_SQL = """
+WITH local AS (
+    SELECT
+        measured_at_ts + :offset_sec AS local_ts,
+        comfort_score
+    FROM measurements
+    WHERE status = 'ok'
+      AND measured_at_ts >= :since_ts
+)
+SELECT
+    (local_ts / 86400 + 3) % 7 AS day_of_week,
+    (local_ts / 3600) % 24 AS hour,
+    AVG(comfort_score) AS avg_score,
+    COUNT(*) AS count
+FROM local
+WHERE (local_ts / 3600) % 24 >= :open_hour
+  AND (local_ts / 3600) % 24 < :close_hour
+GROUP BY day_of_week, hour
+ORDER BY day_of_week, hour
+"""
+
+
+def _get_utc_offset_hours(config: dict) -> int:
+    """設定からカフェのローカル時刻の UTC オフセット（時間）を取得する."""
+    return int(config["cafe"].get("utc_offset_hours", 9))
+
+
+def _to_epoch(measured_at: str, utc_offset_hours: int) -> int:
+    """ISO 8601 形式の計測日時を UNIX 時刻（秒）に変換する.
+
+    タイムゾーン付きの値（末尾 `Z` や `+09:00`）はその時刻として変換する。
+    タイムゾーンなしの値はカフェのローカル時刻とみなす
+    （get_hourly_averages の従来の解釈と同じ）。
+
+    Args:
+        measured_at: 計測日時（ISO 8601）
+        utc_offset_hours: カフェのローカル時刻の UTC オフセット（時間）
+
+    Returns:
+        UNIX 時刻（秒）
+    """
+    parsed = datetime.fromisoformat(measured_at.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone(timedelta(hours=utc_offset_hours)))
+    return int(parsed.timestamp())
+
+
+def _migrate(conn: sqlite3.Connection, config: dict) -> None:
+    """既存 DB のスキーマを最新バージョンに移行する.
+
+    PRAGMA user_version で移行済みのバージョンを判定し、未適用の手順のみ実行する。
+    各手順は途中で失敗しても再実行できるように書く。
+
+    Args:
+        conn: データベース接続
+        config: 設定辞書（UTC オフセットの取得に使う）
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    if version < 1:
+        # measured_at_ts 列を追加し、既存行を measured_at から埋める
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(measurements)")}
+        if "measured_at_ts" not in columns:
+            conn.execute("ALTER TABLE measurements ADD COLUMN measured_at_ts INTEGER")
+        utc_offset_hours = _get_utc_offset_hours(config)
+        rows = conn.execute(
+            "SELECT id, measured_at, status FROM measurements WHERE measured_at_ts IS NULL"
+        ).fetchall()
+        params = []
+        for row_id, measured_at, status in rows:
+            # 旧版の save_error は datetime.utcnow() をタイムゾーンなしで書いていたため、
+            # エラー行のタイムゾーンなしの値は UTC として扱う
+            offset = 0 if status == "error" else utc_offset_hours
+            try:
+                params.append((_to_epoch(measured_at, offset), row_id))
+            except (TypeError, ValueError):
+                # 解釈できない行は NULL のまま残し、DB 全体の移行は続ける
+                logger.warning(
+                    "measured_at を解釈できないため measured_at_ts を補完しない (id=%d): %r",
+                    row_id,
+                    measured_at,
+                )
+        conn.executemany("UPDATE measurements SET measured_at_ts = ? WHERE id = ?", params)
+        logger.info(
+            "スキーマを v1 に移行した: measured_at_ts を %d / %d 件補完", len(params), len(rows)
+        )
 
-def init_db(db_path: Path | None = None, config: dict | None = None) -> Path:
+    if version < 2:
+        # raw_json を measurements_raw へ移し、measurements からは列を削除する
+        conn.execute(_CREATE_RAW_TABLE_SQL)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(measurements)")}
+        if "raw_json" in columns:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO measurements_raw (id, raw_json)
+                SELECT id, raw_json FROM measurements WHERE raw_json IS NOT NULL
+                """
+            )
+            moved = cursor.rowcount
+            if sqlite3.sqlite_version_info >= (3, 35, 0):
+                conn.execute("ALTER TABLE measurements DROP COLUMN raw_json")
+            else:
+                # DROP COLUMN 非対応の SQLite では値だけ消す（列は未使用として残る）
+                conn.execute("UPDATE measurements SET raw_json = NULL")
+            logger.info("スキーマを v2 に移行した: raw_json を %d 件分離", moved)
+
+    if version < _SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+
+def init_db(db_path: Path | str | None = None, config: dict | None = None) -> Path | str:
     """データベースを初期化する（テーブル・インデックス作成）.
 
-    既にテーブルが存在する場合は何もしない（IF NOT EXISTS）。
+    既にテーブルが存在する場合は作成せず（IF NOT EXISTS）、
+    スキーマバージョンが古ければ最新の構成へ移行する。
 
     Args:
-        db_path: データベースファイルのパス（省略時は設定から取得）
+        db_path: データベースファイルのパスまたは URI（省略時は設定から取得）
         config: 設定辞書（省略時は load_config() で読み込む）
 
     Returns:
-        データベースファイルの絶対パス
+        データベースファイルの絶対パス（URI を指定した場合はその URI）
     """
     if config is None:
         config = load_config()
     if db_path is None:
         db_path = get_db_path(config)
 
-    # ディレクトリがなければ作成する
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # ディレクトリがなければ作成する（URI の場合は SQLite が解決するため作成しない）
+    if not _is_uri(db_path):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
     logger.info("データベースを初期化する: %s", db_path)
 
-    conn = sqlite3.connect(str(db_path))
-    try:
+    conn = _get_connection(db_path, config)
+    with conn:
         cursor = conn.cursor()
-        # テーブル作成
-        cursor.execute(_CREATE_TABLE_SQL)
+        # WAL モードにする（DB ファイルに永続化される設定）
+        # 書き込み中も読み取りをブロックせず、コミットごとの fsync も減る
+        cursor.execute("PRAGMA journal_mode=WAL")
+        table_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='measurements'"
+        ).fetchone() is not None
+        if table_exists:
+            # 既存 DB は必要に応じて移行する
+            _migrate(conn, config)
+        else:
+            # 新規作成時は最新スキーマで作るため移行は不要
+            cursor.execute(_CREATE_TABLE_SQL)
+            cursor.execute(_CREATE_RAW_TABLE_SQL)
+            cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
         # インデックス作成
         for sql in _CREATE_INDEXES_SQL:
             cursor.execute(sql)
-        conn.commit()
-        logger.info("データベースの初期化が完了した")
-    finally:
-        conn.close()
+        for name in _OBSOLETE_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    logger.info("データベースの初期化が完了した")
 
     return db_path
 
 
-def _get_connection(db_path: Path | None = None, config: dict | None = None) -> sqlite3.Connection:
+def _is_uri(db_path: Path | str) -> bool:
+    """db_path が SQLite の URI 文字列（`file:` で始まる）かどうかを返す."""
+    return isinstance(db_path, str) and db_path.startswith("file:")
+
+
+def _get_cached_connections() -> dict[str, sqlite3.Connection]:
+    """現在のスレッドの接続キャッシュを返す（未作成なら作成する）."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = {}
+        _local.connections = connections
+    return connections
+
+
+def _get_connection(
+    db_path: Path | str | None = None,
+    config: dict | None = None,
+) -> sqlite3.Connection:
     """データベース接続を取得する.
 
-    行を辞書形式で取得するために row_factory を設定する。
+    接続は現在のスレッド内で DB パスごとにキャッシュし、2回目以降は
+    同じ接続を返す。呼び出し側で close() してはならない
+    （閉じる場合は close_connections() を使う）。
+
+    行は素のタプルで返す（sqlite3.Row によるラップを省くため）。
+    列名で扱いたい場合は呼び出し側で列名タプルと zip する。
+
+    新規接続時には以下を設定する:
+    - synchronous=NORMAL（WAL モードでは破損せず、コミットごとの fsync を省ける）
+    - foreign_keys=ON（measurements_raw のカスケード削除を有効にする）
+
+    `file:` で始まる URI 文字列は uri=True で開く。
+    インメモリ DB（mode=memory&cache=shared）はキャッシュ済みの接続が
+    閉じられるまで保持される。
 
     Args:
-        db_path: データベースファイルのパス
+        db_path: データベースファイルのパスまたは URI
         config: 設定辞書
 
     Returns:
@@ -103,17 +340,129 @@ def _get_connection(db_path: Path | None = None, config: dict | None = None) ->
         if config is None:
             config = load_config()
         db_path = get_db_path(config)
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
+
+    key = str(db_path)
+    connections = _get_cached_connections()
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(key, uri=_is_uri(db_path))
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        connections[key] = conn
+        logger.debug("データベース接続を作成した: %s", key)
     return conn
 
 
-def save_measurement(data: dict, db_path: Path | None = None, config: dict | None = None) -> int:
+def close_connections(db_path: Path | str | None = None) -> None:
+    """キャッシュ済みのデータベース接続を閉じる.
+
+    現在のスレッドの接続のみが対象である。プロセス終了時には
+    atexit からも呼び出される。DB ファイルを削除・差し替える前や、
+    スクリプトの終了処理で明示的に呼び出す。
+
+    Args:
+        db_path: 閉じる対象の DB パス（省略時は全接続を閉じる）
+    """
+    connections = _get_cached_connections()
+    keys = list(connections) if db_path is None else [str(db_path)]
+    for key in keys:
+        conn = connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+            logger.debug("データベース接続を閉じた: %s", key)
+
+
+atexit.register(close_connections)
+
+
+def _measurement_params(data: dict, utc_offset_hours: int) -> tuple:
+    """計測結果の辞書を INSERT 用のパラメータタプルに変換する.
+
+    Args:
+        data: 計測結果の辞書（save_measurement の data と同一形式）
+        utc_offset_hours: タイムゾーンなしの measured_at を解釈する UTC オフセット
+
+    Returns:
+        _INSERT_MEASUREMENT_SQL のプレースホルダ順に並べたタプル
+    """
+    measured_at_ts = data.get("measured_at_ts")
+    if measured_at_ts is None:
+        measured_at_ts = _to_epoch(data["measured_at"], utc_offset_hours)
+    return (
+        data["measured_at"],
+        measured_at_ts,
+        data["download_mbps"],
+        data["upload_mbps"],
+        data["ping_ms"],
+        data["jitter_ms"],
+        data["comfort_score"],
+        data.get("server_id"),
+        data.get("server_name"),
+        data.get("isp"),
+        data.get("result_url"),
+    )
+
+
+def save_measurements_bulk(
+    rows: list[dict],
+    db_path: Path | str | None = None,
+    config: dict | None = None,
+) -> list[int]:
+    """複数の計測結果を1トランザクションでまとめて保存する.
+
+    executemany で全行を INSERT し、最後に1回だけコミットする。
+    行ごとにコミット（fsync）しないため、バックフィルやインポートで
+    大量の行を保存する場合に高速である。
+
+    Args:
+        rows: 計測結果の辞書のリスト（各要素は save_measurement の data と同一形式）
+        db_path: データベースファイルのパス
+        config: 設定辞書
+
+    Returns:
+        挿入された行の ID のリスト（rows と同じ順序）
+    """
+    if not rows:
+        return []
+    if config is None:
+        config = load_config()
+    utc_offset_hours = _get_utc_offset_hours(config)
+
+    conn = _get_connection(db_path, config)
+    # with ブロックを抜けるとコミット（例外時はロールバック）される
+    # 最初の INSERT の直前に暗黙の BEGIN が発行され、全行が1トランザクションになる
+    with conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            _INSERT_MEASUREMENT_SQL,
+            [_measurement_params(data, utc_offset_hours) for data in rows],
+        )
+        # 書き込みロックを保持した1トランザクション内の AUTOINCREMENT は連番になるため、
+        # 最後に挿入した行の ID から全行の ID を逆算する
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        row_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+        # 生 JSON は同じトランザクション内で measurements_raw に保存する
+        cursor.executemany(
+            _INSERT_RAW_SQL,
+            [
+                (row_id, data["raw_json"])
+                for row_id, data in zip(row_ids, rows)
+                if data.get("raw_json") is not None
+            ],
+        )
+    logger.info("計測結果を一括保存した: %d 件", len(row_ids))
+    return row_ids
+
+
+def save_measurement(data: dict, db_path: Path | str | None = None, config: dict | None = None) -> int:
     """計測結果をデータベースに保存する.
 
+    save_measurements_bulk() に1行だけ渡す薄いラッパーである。
+
     Args:
         data: 計測結果の辞書。以下のキーを含む:
             - measured_at (str): 計測日時（ISO 8601）
+            - measured_at_ts (int, optional): 計測日時の UNIX 時刻（省略時は measured_at から算出）
             - download_mbps (float): ダウンロード速度
             - upload_mbps (float): アップロード速度
             - ping_ms (float): レイテンシ
@@ -123,57 +472,29 @@ def save_measurement(data: dict, db_path: Path | None = None, config: dict | Non
             - server_name (str, optional): サーバ名
             - isp (str, optional): ISP名
             - result_url (str, optional): 結果URL
-            - raw_json (str, optional): 生JSON
+            - raw_json (str, optional): 生JSON（measurements_raw に保存される）
         db_path: データベースファイルのパス
         config: 設定辞書
 
     Returns:
         挿入された行の ID
     """
-    conn = _get_connection(db_path, config)
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO measurements (
-                measured_at, status, download_mbps, upload_mbps,
-                ping_ms, jitter_ms, comfort_score,
-                server_id, server_name, isp, result_url, raw_json
-            ) VALUES (?, 'ok', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                data["measured_at"],
-                data["download_mbps"],
-                data["upload_mbps"],
-                data["ping_ms"],
-                data["jitter_ms"],
-                data["comfort_score"],
-                data.get("server_id"),
-                data.get("server_name"),
-                data.get("isp"),
-                data.get("result_url"),
-                data.get("raw_json"),
-            ),
-        )
-        conn.commit()
-        row_id = cursor.lastrowid
-        logger.info(
-            "計測結果を保存した (id=%d): DL=%.1f Mbps, UL=%.1f Mbps, Ping=%.1f ms, Score=%.1f",
-            row_id,
-            data["download_mbps"],
-            data["upload_mbps"],
-            data["ping_ms"],
-            data["comfort_score"],
-        )
-        return row_id
-    finally:
-        conn.close()
+    row_id = save_measurements_bulk([data], db_path=db_path, config=config)[0]
+    logger.info(
+        "計測結果を保存した (id=%d): DL=%.1f Mbps, UL=%.1f Mbps, Ping=%.1f ms, Score=%.1f",
+        row_id,
+        data["download_mbps"],
+        data["upload_mbps"],
+        data["ping_ms"],
+        data["comfort_score"],
+    )
+    return row_id
 
 
 def save_error(
     error_message: str,
     raw_output: str | None = None,
-    db_path: Path | None = None,
+    db_path: Path | str | None = None,
     config: dict | None = None,
 ) -> int:
     """計測エラーをデータベースに記録する.
@@ -182,7 +503,7 @@ def save_error(
 
     Args:
         error_message: エラーメッセージ
-        raw_output: エラー時の生出力（デバッグ用）
+        raw_output: エラー時の生出力（デバッグ用、measurements_raw に保存される）
         db_path: データベースファイルのパス
         config: 設定辞書
 
@@ -190,29 +511,55 @@ def save_error(
         挿入された行の ID
     """
     conn = _get_connection(db_path, config)
-    try:
+    now_utc = datetime.now(timezone.utc)
+    now = now_utc.strftime(_UTC_FORMAT)
+    with conn:
         cursor = conn.cursor()
-        now = datetime.utcnow().isoformat()
         cursor.execute(
             """
-            INSERT INTO measurements (measured_at, status, error_message, raw_json)
-            VALUES (?, 'error', ?, ?)
+            INSERT INTO measurements (measured_at, measured_at_ts, status, error_message)
+            VALUES (?, ?, 'error', ?)
             """,
-            (now, error_message, raw_output),
+            (now, int(now_utc.timestamp()), error_message),
         )
-        conn.commit()
         row_id = cursor.lastrowid
-        logger.warning("計測エラーを記録した (id=%d): %s", row_id, error_message)
-        return row_id
-    finally:
-        conn.close()
+        if raw_output is not None:
+            cursor.execute(_INSERT_RAW_SQL, (row_id, raw_output))
+    logger.warning("計測エラーを記録した (id=%d): %s", row_id, error_message)
+    return row_id
+
+
+def get_raw_json(
+    measurement_id: int,
+    db_path: Path | str | None = None,
+    config: dict | None = None,
+) -> str | None:
+    """計測結果の生 JSON（エラー時は生出力）を取得する.
+
+    集計クエリでは読まない列のため measurements_raw に分離しており、
+    デバッグや再解析で必要になったときだけこの関数で取得する。
+
+    Args:
+        measurement_id: measurements の行 ID
+        db_path: データベースファイルのパス
+        config: 設定辞書
+
+    Returns:
+        生 JSON 文字列。保存されていない場合は None
+    """
+    conn = _get_connection(db_path, config)
+    row = conn.execute(
+        "SELECT raw_json FROM measurements_raw WHERE id = ?",
+        (measurement_id,),
+    ).fetchone()
+    return row[0] if row is not None else None
 
 
 def get_hourly_averages(
     days: int = 28,
     open_hour: int | None = None,
     close_hour: int | None = None,
-    db_path: Path | None = None,
+    db_path: Path | str | None = None,
     config: dict | None = None,
 ) -> list[dict]:
     """開館時間内の時間帯×曜日の平均スコアを取得する.
@@ -240,73 +587,39 @@ def get_hourly_averages(
         open_hour = config["cafe"]["open_hour"]
     if close_hour is None:
         close_hour = config["cafe"]["close_hour"]
-    utc_offset_hours = int(config["cafe"].get("utc_offset_hours", 9))
-    offset_modifier = f"{utc_offset_hours:+d} hours"
+    utc_offset_hours = _get_utc_offset_hours(config)
 
     conn = _get_connection(db_path, config)
-    try:
-        # 集計対象の開始日を計算する
-        since = (datetime.utcnow() - timedelta(days=days)).isoformat()
-
-        # SQLite の strftime で曜日と時間帯を抽出して集計する
-        # Speedtest の measured_at は UTC(Z) を含むため、開館時間の判定前に
-        # カフェのローカル時刻へ変換して扱う。
-        local_dt_expr = (
-            "CASE WHEN measured_at LIKE '%Z' "
-            "THEN datetime(measured_at, ?) "
-            "ELSE measured_at END"
-        )
-        # strftime('%w', ...) は 0=日曜 なので、Python の weekday() に変換する
-        cursor = conn.cursor()
-        cursor.execute(
-            f"""
-            SELECT
-                -- SQLite %w: 0=日,1=月,...,6=土 → Python weekday: 0=月,...,6=日
-                CASE CAST(strftime('%w', {local_dt_expr}) AS INTEGER)
-                    WHEN 0 THEN 6  -- 日曜 → 6
-                    ELSE CAST(strftime('%w', {local_dt_expr}) AS INTEGER) - 1
-                END AS day_of_week,
-                CAST(strftime('%H', {local_dt_expr}) AS INTEGER) AS hour,
-                AVG(comfort_score) AS avg_score,
-                COUNT(*) AS count
-            FROM measurements
-            WHERE status = 'ok'
-              AND measured_at >= ?
-              AND CAST(strftime('%H', {local_dt_expr}) AS INTEGER) >= ?
-              AND CAST(strftime('%H', {local_dt_expr}) AS INTEGER) < ?
-            GROUP BY day_of_week, hour
-            ORDER BY day_of_week, hour
-            """,
-            (
-                offset_modifier,
-                offset_modifier,
-                offset_modifier,
-                since,
-                offset_modifier,
-                open_hour,
-                offset_modifier,
-                close_hour,
-            ),
-        )
-        rows = cursor.fetchall()
-        result = [
-            {
-                "day_of_week": row["day_of_week"],
-                "hour": row["hour"],
-                "avg_score": round(row["avg_score"], 1),
-                "count": row["count"],
-            }
-            for row in rows
-        ]
-        logger.info("時間帯別平均スコアを取得した: %d 件", len(result))
-        return result
-    finally:
-        conn.close()
+    # 集計対象の開始時刻（UNIX 時刻）を計算する
+    since_ts = int((datetime.now(timezone.utc) - timedelta(days=days)).timestamp())
+
+    cursor = conn.cursor()
+    cursor.execute(
+        _HOURLY_AVERAGES_SQL,
+        {
+            "offset_sec": utc_offset_hours * 3600,
+            "since_ts": since_ts,
+            "open_hour": open_hour,
+            "close_hour": close_hour,
+        },
+    )
+    rows = cursor.fetchall()
+    result = [
+        {
+            "day_of_week": day_of_week,
+            "hour": hour,
+            "avg_score": round(avg_score, 1),
+            "count": count,
+        }
+        for day_of_week, hour, avg_score, count in rows
+    ]
+    logger.info("時間帯別平均スコアを取得した: %d 件", len(result))
+    return result
 
 
 def get_recent_measurements(
     hours: int = 24,
-    db_path: Path | None = None,
+    db_path: Path | str | None = None,
     config: dict | None = None,
 ) -> list[dict]:
     """直近 N 時間の計測結果を取得する（折れ線グラフ用）.
@@ -326,35 +639,24 @@ def get_recent_measurements(
         - comfort_score (float): 快適度スコア
     """
     conn = _get_connection(db_path, config)
-    try:
-        since = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT measured_at, download_mbps, upload_mbps,
-                   ping_ms, jitter_ms, comfort_score
-            FROM measurements
-            WHERE status = 'ok'
-              AND measured_at >= ?
-            ORDER BY measured_at ASC
-            """,
-            (since,),
-        )
-        rows = cursor.fetchall()
-        result = [dict(row) for row in rows]
-        logger.info("直近 %d 時間の計測結果を取得した: %d 件", hours, len(result))
-        return result
-    finally:
-        conn.close()
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    cursor = conn.cursor()
+    cursor.execute(_RECENT_MEASUREMENTS_SQL, (int(since.timestamp()),))
+    rows = cursor.fetchall()
+    result = [dict(zip(_RECENT_COLUMNS, row)) for row in rows]
+    logger.info("直近 %d 時間の計測結果を取得した: %d 件", hours, len(result))
+    return result
 
 
 def cleanup_old_data(
     retention_days: int | None = None,
-    db_path: Path | None = None,
+    db_path: Path | str | None = None,
     config: dict | None = None,
 ) -> int:
     """保存期間を超えた古いデータを削除する.
 
+    measurements_raw の対応行は外部キーのカスケードで同時に削除される。
+
     Args:
         retention_days: 保存期間（日数）。省略時は設定値を使用
         db_path: データベースファイルのパス
@@ -369,21 +671,18 @@ def cleanup_old_data(
         retention_days = config["storage"]["retention_days"]
 
     conn = _get_connection(db_path, config)
-    try:
-        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    with conn:
         cursor = conn.cursor()
         cursor.execute(
-            "DELETE FROM measurements WHERE measured_at < ?",
-            (cutoff,),
-        )
-        conn.commit()
-        deleted = cursor.rowcount
-        logger.info(
-            "%d 日以上前のデータを %d 件削除した（カットオフ: %s）",
-            retention_days,
-            deleted,
-            cutoff,
+            "DELETE FROM measurements WHERE measured_at_ts < ?",
+            (int(cutoff.timestamp()),),
         )
-        return deleted
-    finally:
-        conn.close()
+    deleted = cursor.rowcount
+    logger.info(
+        "%d 日以上前のデータを %d 件削除した（カットオフ: %s）",
+        retention_days,
+        deleted,
+        cutoff.strftime(_UTC_FORMAT),
+    )
+    return deleted
@@ -7,10 +7,14 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import logging
 import platform
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import NamedTuple
 
 import numpy as np
 import matplotlib
@@ -18,25 +22,57 @@ import matplotlib
 # 非対話バックエンドを先に設定する（pyplot import 前が必須）
 matplotlib.use("Agg")
 
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.ticker as mticker
 import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
 
 from .config import load_config, get_assets_dir
 from .storage import get_hourly_averages, get_recent_measurements
 
 logger = logging.getLogger(__name__)
 
+# 実行環境の OS 名（プロセス内で変わらないため import 時に一度だけ取得する）
+_SYSTEM = platform.system()
+
+# 日本語フォントを設定済みかどうか（rcParams の書き換えはプロセスで一度だけ行う）
+_FONT_CONFIGURED = False
+
+# レポート画像の Figure と Axes（generate_heatmap の呼び出し間で再利用する）
+# _get_report_figure() が作成する _ReportFigure
+_FIG = None
+
+# 折れ線グラフの色
+_COLOR_DOWNLOAD = "#2196F3"
+_COLOR_PING = "#FF5722"
+
+# PNG の書き出し（エンコード）を行うバックグラウンドスレッド
+# 描画は matplotlib がスレッドセーフでないためメインスレッドで行い、
+# ラスタライズ済みの画素配列のエンコードとファイル書き込みだけをここに任せる
+_SAVE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="png-save")
+
+# savefig(bbox_inches="tight") の既定余白（インチ）と同じ値
+_SAVE_PAD_INCHES = 0.1
+
+# Agg キャンバスが画素数を切り捨てる際に許容する浮動小数の誤差（FigureCanvasBase.get_width_height と同じ値）
+_PIXEL_EPSILON = 1e-8
+
+# レポート画像の入力ハッシュを記録する PNG のテキストチャンク（tEXt）のキー
+# 画像ファイル自体に埋め込むため、cron で毎回別プロセスとして起動されても、
+# 入力が同じで画像も残っていれば次の generate_heatmap で描画を省略できる
+_INPUT_HASH_KEY = "speed-tracker:input-hash"
+
 
 def _parse_iso_datetime(value: str) -> datetime:
     """ISO 8601 文字列を datetime に変換する.
 
-    Speedtest の timestamp は末尾が `Z` の場合があるため、
-    Python 標準で解釈可能な `+00:00` に置換して扱う。
+    Speedtest の timestamp は末尾が `Z` の場合がある。
+    Python 3.11 以降の fromisoformat() は `Z` をそのまま解釈できるため、置換せずに渡す。
     """
-    normalized = value.replace("Z", "+00:00")
-    parsed = datetime.fromisoformat(normalized)
+    parsed = datetime.fromisoformat(value)
     # aware/naive 混在を防ぐため、内部では UTC naive に正規化して扱う
     if parsed.tzinfo is not None:
         return parsed.astimezone(timezone.utc).replace(tzinfo=None)
@@ -44,9 +80,12 @@ def _parse_iso_datetime(value: str) -> datetime:
 
 
 def _parse_iso_datetime_local(value: str) -> datetime:
-    """ISO 8601 文字列をローカル時刻の naive datetime に変換する."""
-    normalized = value.replace("Z", "+00:00")
-    parsed = datetime.fromisoformat(normalized)
+    """ISO 8601 文字列をローカル時刻の naive datetime に変換する.
+
+    タイムゾーンなしの値（DB に保存したローカル時刻）はそのまま返し、
+    タイムゾーン付きの値のみローカル時刻へ変換する。
+    """
+    parsed = datetime.fromisoformat(value)
     if parsed.tzinfo is not None:
         return parsed.astimezone().replace(tzinfo=None)
     return parsed
@@ -56,12 +95,34 @@ def _filter_today_open_hours_measurements(
     measurements: list[dict],
     open_hour: int,
     close_hour: int,
+    today: date | None = None,
 ) -> list[dict]:
-    """計測データを当日開館時間内のデータに絞り込む."""
-    today = datetime.now().date()
+    """計測データを当日開館時間内のデータに絞り込む.
+
+    日時のパースは比較的重いため、先頭10文字の日付部分で先に候補を絞る。
+    タイムゾーンなしの値は日付部分が当日でなければパースせずに除外する。
+    タイムゾーン付きの値はローカル時刻への変換で日付が前後にずれ得るため、
+    前後1日の範囲のみパースして判定する。
+    `today` を省略した場合は現在の日付を当日とする。
+    """
+    if today is None:
+        today = datetime.now().date()
+    today_str = today.isoformat()
+    nearby_dates = {
+        (today - timedelta(days=1)).isoformat(),
+        today_str,
+        (today + timedelta(days=1)).isoformat(),
+    }
     filtered = []
     for row in measurements:
-        measured = _parse_iso_datetime_local(row["measured_at"])
+        value = row["measured_at"]
+        date_part = value[:10]
+        if date_part != today_str:
+            time_part = value[11:]
+            has_offset = "Z" in time_part or "+" in time_part or "-" in time_part
+            if not has_offset or date_part not in nearby_dates:
+                continue
+        measured = _parse_iso_datetime_local(value)
         if measured.date() != today:
             continue
         if open_hour <= measured.hour < close_hour:
@@ -73,6 +134,7 @@ def _resolve_output_path(
     config: dict,
     output_path: str | Path | None,
     filename_granularity: str,
+    now: datetime | None = None,
 ) -> Path:
     """出力パスを決定する.
 
@@ -80,34 +142,46 @@ def _resolve_output_path(
         config: 設定辞書
         output_path: 明示指定パス
         filename_granularity: `daily` または `hourly`
+        now: ファイル名に使う日時（省略時は現在時刻）
 
     Returns:
         出力ファイルパス
     """
     if output_path is not None:
         path = Path(output_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        return path
-
-    assets_dir = get_assets_dir(config)
-    assets_dir.mkdir(parents=True, exist_ok=True)
-    now = datetime.now()
-    if filename_granularity == "hourly":
-        filename = f"{now.strftime('%Y-%m-%d_%H00')}.png"
     else:
-        filename = f"{now.strftime('%Y-%m-%d')}.png"
-    return assets_dir / filename
+        if now is None:
+            now = datetime.now()
+        if filename_granularity == "hourly":
+            filename = f"{now.strftime('%Y-%m-%d_%H00')}.png"
+        else:
+            filename = f"{now.strftime('%Y-%m-%d')}.png"
+        path = get_assets_dir(config) / filename
 
+    # 出力先ディレクトリの作成はどちらの場合もここで1回だけ行う
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
 
-def _set_open_hours_xaxis(ax, open_hour: int, close_hour: int) -> None:
-    """開館時間の時刻ラベルをX軸に明示する."""
-    day_start = datetime.now().replace(
+
+def _set_open_hours_xaxis(
+    ax,
+    open_hour: int,
+    close_hour: int,
+    now: datetime | None = None,
+) -> None:
+    """開館時間の時刻ラベルをX軸に明示する.
+
+    `now` を省略した場合は現在時刻の日付を使う。
+    """
+    if now is None:
+        now = datetime.now()
+    day_start = now.replace(
         hour=open_hour,
         minute=0,
         second=0,
         microsecond=0,
     )
-    day_end = datetime.now().replace(
+    day_end = now.replace(
         hour=close_hour,
         minute=0,
         second=0,
@@ -131,8 +205,14 @@ def _setup_japanese_font() -> None:
     macOS: Hiragino Sans
     Linux: Noto Sans CJK JP
     その他: デフォルトフォントにフォールバック
+
+    設定はプロセス内で一度だけ行い、2回目以降の呼び出しは何もしない。
     """
-    system = platform.system()
+    global _FONT_CONFIGURED
+    if _FONT_CONFIGURED:
+        return
+
+    system = _SYSTEM
     if system == "Darwin":
         # macOS
         font_name = "Hiragino Sans"
@@ -146,11 +226,210 @@ def _setup_japanese_font() -> None:
     matplotlib.rcParams["font.family"] = font_name
     # マイナス記号の文字化け対策
     matplotlib.rcParams["axes.unicode_minus"] = False
+    _FONT_CONFIGURED = True
     logger.info("日本語フォントを設定した: %s", font_name)
 
 
+class _ReportFigure(NamedTuple):
+    """再利用するレポート画像の Figure・Axes・描画要素."""
+
+    fig: Figure
+    ax_heatmap: object  # 上段: ヒートマップ
+    ax_cbar: object  # 上段: カラーバー
+    ax_download: object  # 中段: 折れ線グラフ（左軸: download）
+    ax_ping: object  # 中段: 折れ線グラフ（右軸: ping）
+    ax_summary: object  # 下段: テキストサマリ
+    line_download: object  # download の Line2D
+    line_ping: object  # ping の Line2D
+    legend: object  # 折れ線グラフの凡例
+    no_data_text: object  # データなし時のメッセージ
+
+
+def _get_report_figure() -> _ReportFigure:
+    """レポート画像用の Figure と Axes を返す.
+
+    初回呼び出し時に作成し、2回目以降は再利用する
+    （Figure・Axes・Canvas の生成を毎回行わないため）。
+    ヒートマップとサマリの Axes は毎回クリアする。折れ線グラフの Line2D・凡例・
+    メッセージは作成済みのものを使い回し、呼び出し側で set_data() 等により更新する。
+    スレッドセーフではないため、同時に複数の画像を生成してはならない。
+
+    Returns:
+        _ReportFigure
+    """
+    global _FIG
+    if _FIG is None:
+        fig = Figure(figsize=(14, 12))
+        # バックグラウンド保存のため画素バッファを直接読めるよう Agg キャンバスを付ける
+        FigureCanvasAgg(fig)
+        # カラーバーの列はヒートマップの行のみで使う
+        grid = fig.add_gridspec(
+            3, 2,
+            height_ratios=[3, 2, 1.2],
+            width_ratios=[40, 1],
+        )
+        ax_heatmap = fig.add_subplot(grid[0, 0])
+        ax_cbar = fig.add_subplot(grid[0, 1])
+        ax_download = fig.add_subplot(grid[1, :])
+        ax_ping = ax_download.twinx()
+        ax_summary = fig.add_subplot(grid[2, :])
+
+        (line_download,) = ax_download.plot(
+            [], [],
+            color=_COLOR_DOWNLOAD,
+            marker="o",
+            markersize=3,
+            linewidth=1.5,
+            label="Download (Mbps)",
+        )
+        (line_ping,) = ax_ping.plot(
+            [], [],
+            color=_COLOR_PING,
+            marker="s",
+            markersize=3,
+            linewidth=1.5,
+            label="Ping (ms)",
+        )
+        # 凡例は2本の線から一度だけ作る
+        legend = ax_download.legend(
+            [line_download, line_ping],
+            [line_download.get_label(), line_ping.get_label()],
+            loc="upper right",
+        )
+        no_data_text = ax_download.text(
+            0.5, 0.5,
+            "本日開館時間のデータなし",
+            transform=ax_download.transAxes,
+            ha="center",
+            va="center",
+            fontsize=14,
+            color="gray",
+        )
+        _FIG = _ReportFigure(
+            fig=fig,
+            ax_heatmap=ax_heatmap,
+            ax_cbar=ax_cbar,
+            ax_download=ax_download,
+            ax_ping=ax_ping,
+            ax_summary=ax_summary,
+            line_download=line_download,
+            line_ping=line_ping,
+            legend=legend,
+            no_data_text=no_data_text,
+        )
+        return _FIG
+
+    for ax in (_FIG.ax_heatmap, _FIG.ax_cbar, _FIG.ax_summary):
+        ax.clear()
+    # tight_layout() は描画時の dpi で文字の大きさを測るため、保存時に変更した dpi を
+    # 初回と同じ既定値に戻しておく（戻さないと、同じ入力でも画像サイズが数ピクセル変わる）
+    _FIG.fig.set_dpi(matplotlib.rcParams["figure.dpi"])
+    return _FIG
+
+
+def _render_png_buffer(fig: Figure, dpi: int) -> np.ndarray:
+    """Figure をラスタライズし、余白を詰めた RGBA 配列を返す.
+
+    savefig(bbox_inches="tight") と同様に、描画内容の外接矩形に
+    _SAVE_PAD_INCHES の余白を付けた範囲を切り出す（Figure の外にはみ出す分は除く）。
+    matplotlib の描画はスレッドセーフでないため、メインスレッドで呼び出すこと。
+
+    Args:
+        fig: 描画対象の Figure（Agg キャンバス付き）
+        dpi: 出力解像度
+
+    Returns:
+        (高さ, 幅, 4) の uint8 配列（Figure とはメモリを共有しない複製）
+    """
+    fig.set_dpi(dpi)
+    canvas = fig.canvas
+    canvas.draw()
+    bbox = fig.get_tightbbox(canvas.get_renderer()).padded(_SAVE_PAD_INCHES)
+
+    buf = np.asarray(canvas.buffer_rgba())
+    height, width = buf.shape[:2]
+    # bbox はインチ単位・原点が左下のため、画素単位・原点が左上に変換する
+    # 切り出す大きさは savefig(bbox_inches="tight") のキャンバスと同じく、bbox の幅・高さ × dpi を
+    # 切り捨てた画素数とする（FigureCanvasBase.get_width_height と同じく 1e-8 の誤差は切り上げる）
+    x0 = max(int(np.floor(bbox.x0 * dpi)), 0)
+    y0 = max(int(np.floor(height - bbox.y1 * dpi)), 0)
+    x1 = min(x0 + int(bbox.width * dpi + _PIXEL_EPSILON), width)
+    y1 = min(y0 + int(bbox.height * dpi + _PIXEL_EPSILON), height)
+    return buf[y0:y1, x0:x1].copy()
+
+
+def _save_png(
+    buf: np.ndarray, output_path: Path, dpi: int, input_hash: str | None = None
+) -> Path:
+    """RGBA 配列を PNG として保存する（バックグラウンドスレッドで実行される）.
+
+    Args:
+        buf: _render_png_buffer() の戻り値
+        output_path: 出力ファイルパス
+        dpi: PNG に記録する解像度
+        input_hash: テキストチャンクに埋め込む入力ハッシュ（省略時は埋め込まない）
+
+    Returns:
+        出力ファイルパス
+    """
+    pnginfo = PngInfo()
+    if input_hash is not None:
+        pnginfo.add_text(_INPUT_HASH_KEY, input_hash)
+    try:
+        # 圧縮レベルは既定の 6 ではなく 3 とする（グラフ画像ではサイズ増が小さく、エンコードが速い）
+        Image.fromarray(buf).save(
+            output_path,
+            format="PNG",
+            compress_level=3,
+            optimize=False,
+            dpi=(dpi, dpi),
+            pnginfo=pnginfo,
+        )
+    except Exception:
+        logger.exception("レポート画像の保存に失敗した: %s", output_path)
+        raise
+    logger.info("レポート画像を保存した: %s", output_path)
+    return output_path
+
+
+class _HourlyAverageArrays(NamedTuple):
+    """get_hourly_averages() の結果を列ごとの配列にしたもの（同じ添字が同じ行）."""
+
+    day_of_week: np.ndarray  # int8: 0=月〜6=日
+    hour: np.ndarray  # int8: 時間帯（0-23）
+    avg_score: np.ndarray  # float64: 平均快適度スコア（サマリの平均値の計算で丸め誤差を持ち込まない）
+
+
+def _averages_to_soa(
+    averages: list[dict] | _HourlyAverageArrays,
+) -> _HourlyAverageArrays:
+    """get_hourly_averages() の結果を列ごとの NumPy 配列に変換する.
+
+    辞書のキー参照は変換時の1回で済ませ、以降の集計は配列演算だけで行う。
+    変換済みの値を渡した場合はそのまま返す。
+
+    Args:
+        averages: get_hourly_averages() の戻り値、または変換済みの _HourlyAverageArrays
+
+    Returns:
+        _HourlyAverageArrays
+    """
+    if isinstance(averages, _HourlyAverageArrays):
+        return averages
+
+    n = len(averages)
+    day_of_week = np.empty(n, dtype=np.int8)
+    hour = np.empty(n, dtype=np.int8)
+    avg_score = np.empty(n, dtype=np.float64)
+    for i, entry in enumerate(averages):
+        day_of_week[i] = entry["day_of_week"]
+        hour[i] = entry["hour"]
+        avg_score[i] = entry["avg_score"]
+    return _HourlyAverageArrays(day_of_week, hour, avg_score)
+
+
 def _build_heatmap_data(
-    averages: list[dict],
+    averages: list[dict] | _HourlyAverageArrays,
     open_hour: int,
     close_hour: int,
     days_of_week: list[str],
@@ -158,7 +437,7 @@ def _build_heatmap_data(
     """集計データからヒートマップ用の2次元配列を構築する.
 
     Args:
-        averages: get_hourly_averages() の戻り値
+        averages: get_hourly_averages() の戻り値（_averages_to_soa() で変換済みの値も可）
         open_hour: 開館時間
         close_hour: 閉館時間
         days_of_week: 曜日ラベルのリスト
@@ -175,14 +454,15 @@ def _build_heatmap_data(
     n_hours = len(hours)
 
     # NaN で初期化（データ欠損を表す）
-    data = np.full((n_days, n_hours), np.nan)
+    # スコアは 0-100 の小数1桁のため float32 で十分な精度がある（描画時に走査するバイト数を半減させる）
+    data = np.full((n_days, n_hours), np.nan, dtype=np.float32)
 
-    # 集計データを配列に埋める
-    for entry in averages:
-        day_idx = entry["day_of_week"]  # 0=月〜6=日
-        hour_idx = entry["hour"] - open_hour
-        if 0 <= day_idx < n_days and 0 <= hour_idx < n_hours:
-            data[day_idx, hour_idx] = entry["avg_score"]
+    # 集計データを配列に埋める（インデックス配列で一括して代入する）
+    arrays = _averages_to_soa(averages)
+    day_idx = arrays.day_of_week
+    hour_idx = arrays.hour - open_hour
+    valid = (day_idx >= 0) & (day_idx < n_days) & (hour_idx >= 0) & (hour_idx < n_hours)
+    data[day_idx[valid], hour_idx[valid]] = arrays.avg_score[valid]
 
     # NaN のセルをマスクとする（グレー表示用）
     mask = np.isnan(data)
@@ -201,30 +481,6 @@ def _build_heatmap_data(
     return data, mask, x_labels, y_labels
 
 
-def _build_annotation(data: np.ndarray, mask: np.ndarray) -> list[list[str]]:
-    """ヒートマップのアノテーション文字列を構築する.
-
-    データ有りのセルはスコア値、欠損セルは "-" を表示する。
-
-    Args:
-        data: スコアの2次元配列
-        mask: 欠損マスク
-
-    Returns:
-        アノテーション文字列の2次元リスト
-    """
-    annot = []
-    for i in range(data.shape[0]):
-        row = []
-        for j in range(data.shape[1]):
-            if mask[i, j]:
-                row.append("-")
-            else:
-                row.append(f"{data[i, j]:.0f}")
-        annot.append(row)
-    return annot
-
-
 def generate_heatmap(
     output_path: str | Path | None = None,
     days: int = 28,
@@ -232,12 +488,19 @@ def generate_heatmap(
     summary_text: str | None = None,
     config: dict | None = None,
     db_path: Path | None = None,
+    wait: bool = True,
 ) -> Path:
     """ヒートマップ + 折れ線グラフの複合画像を生成する.
 
     上段: 開館時間帯（9-21時台）の快適度ヒートマップ（曜日×時間帯）
     下段: 直近24時間の download(Mbps) と ping(ms) の推移（2軸グラフ）
 
+    PNG の場合、描画はこの関数内で行い、エンコードと書き込みは
+    バックグラウンドスレッドで行う。wait=False の場合は書き込みの完了を待たずに戻る
+    （プロセス終了時には未完了の書き込みを待ってから終了する）。
+    PNG には入力データ・設定のハッシュをテキストチャンクとして埋め込み、
+    次回の呼び出しで同じ出力パスの PNG のハッシュが一致した場合は、描画せずにそのパスを返す。
+
     Args:
         output_path: 出力ファイルパス（省略時は assets/YYYY-MM-DD.png）
         days: ヒートマップの集計対象日数（デフォルト28日）
@@ -245,6 +508,7 @@ def generate_heatmap(
         summary_text: 画像に埋め込む傾向サマリ文字列（省略時は自動生成）
         config: 設定辞書
         db_path: データベースファイルのパス
+        wait: PNG の書き込み完了を待ってから戻るか（デフォルト True）
 
     Returns:
         出力ファイルの絶対パス
@@ -263,43 +527,69 @@ def generate_heatmap(
     # 日本語フォントを設定する
     _setup_japanese_font()
 
+    # 現在時刻は一度だけ取得し、出力ファイル名・当日の判定・X軸の範囲で共有する
+    # （日付をまたぐ瞬間に実行されても、すべて同じ日付で揃える）
+    now = datetime.now()
+
     # 出力パスの決定
-    output_path = _resolve_output_path(config, output_path, filename_granularity)
+    output_path = _resolve_output_path(config, output_path, filename_granularity, now=now)
 
     logger.info("レポート画像を生成する: %s", output_path)
 
     # データ取得
-    averages = get_hourly_averages(
-        days=days,
-        open_hour=open_hour,
-        close_hour=close_hour,
-        db_path=db_path,
-        config=config,
+    # 集計結果は列ごとの配列に一度だけ変換し、ヒートマップとサマリの両方で使う
+    averages = _averages_to_soa(
+        get_hourly_averages(
+            days=days,
+            open_hour=open_hour,
+            close_hour=close_hour,
+            db_path=db_path,
+            config=config,
+        )
     )
     # 開館時間内の推移を描くため、前日分も含む範囲で取得して当日分に絞り込む
     recent_candidates = get_recent_measurements(hours=48, db_path=db_path, config=config)
+
+    # 既存の PNG に埋め込まれた入力ハッシュが同じであれば、描画と保存を省略する
+    is_png = output_path.suffix.lower() == ".png"
+    input_hash = _report_input_hash(
+        config, days, summary_text, averages, recent_candidates, now.date()
+    )
+    if is_png and _read_report_hash(output_path) == input_hash:
+        logger.info("入力データが前回と同じため、画像の生成を省略した: %s", output_path)
+        return output_path
+
     recent = _filter_today_open_hours_measurements(
         measurements=recent_candidates,
         open_hour=open_hour,
         close_hour=close_hour,
+        today=now.date(),
     )
     if summary_text is None:
-        summary_text = build_trend_summary_text(days=days, config=config, db_path=db_path)
+        # 取得済みの集計結果を渡し、サマリ側で同じクエリを再実行しない
+        summary_text = build_trend_summary_text(
+            days=days,
+            config=config,
+            db_path=db_path,
+            averages=averages,
+            recent_48h=recent_candidates,
+            now=now,
+        )
 
     # 複合画像を作成する（上段: ヒートマップ、中段: 折れ線、下段: サマリ）
-    fig, axes = plt.subplots(
-        3, 1,
-        figsize=(14, 12),
-        gridspec_kw={"height_ratios": [3, 2, 1.2]},
-    )
+    report = _get_report_figure()
+    fig = report.fig
+    ax_heatmap = report.ax_heatmap
+    ax_cbar = report.ax_cbar
+    ax_download = report.ax_download
+    ax_ping = report.ax_ping
+    ax_summary = report.ax_summary
 
     # === 上段: ヒートマップ ===
-    ax_heatmap = axes[0]
 
     data, mask, x_labels, y_labels = _build_heatmap_data(
         averages, open_hour, close_hour, days_of_week
     )
-    annot = _build_annotation(data, mask)
 
     # 欠損セルをグレーで表示するため、背景色を設定する
     ax_heatmap.set_facecolor("#cccccc")
@@ -311,15 +601,23 @@ def generate_heatmap(
         cmap=colormap,
         vmin=0,
         vmax=100,
-        annot=np.array(annot),
-        fmt="",
+        # スコアの書式化は seaborn に任せる（マスクしたセルには描画されない）
+        annot=True,
+        fmt=".0f",
         linewidths=0.5,
         linecolor="white",
         xticklabels=x_labels,
         yticklabels=y_labels,
+        cbar_ax=ax_cbar,
         cbar_kws={"label": "快適度スコア (0-100)"},
+        # セルの QuadMesh はラスタ画像として埋め込む（PDF/SVG 出力でセルごとのパスを書き出さない）
+        rasterized=True,
     )
 
+    # 欠損セルにだけ "-" を描く（セル (i, j) の中心はデータ座標で (j + 0.5, i + 0.5)）
+    for i, j in np.argwhere(mask):
+        ax_heatmap.text(j + 0.5, i + 0.5, "-", ha="center", va="center", color="#666666")
+
     ax_heatmap.set_title(
         f"時間帯別 快適度ヒートマップ（過去{days}日間）",
         fontsize=14,
@@ -330,66 +628,49 @@ def generate_heatmap(
     ax_heatmap.set_ylabel("曜日")
 
     # === 下段: 折れ線グラフ（2軸、当日開館時間）===
-    ax_download = axes[1]
+    # 作成済みの Line2D・凡例・メッセージを再利用し、表示の切り替えとデータ差し替えのみ行う
+    # 右軸（Ping）と凡例はデータがある場合のみ表示する
+    has_recent = bool(recent)
+    ax_ping.set_visible(has_recent)
+    report.legend.set_visible(has_recent)
+    report.no_data_text.set_visible(not has_recent)
 
-    if recent:
-        # 日時文字列をパースする
-        times = [_parse_iso_datetime_local(r["measured_at"]) for r in recent]
-        downloads = [r["download_mbps"] for r in recent]
-        pings = [r["ping_ms"] for r in recent]
-
-        # ダウンロード速度（左軸）
-        color_dl = "#2196F3"
-        ax_download.plot(
-            times, downloads,
-            color=color_dl,
-            marker="o",
-            markersize=3,
-            linewidth=1.5,
-            label="Download (Mbps)",
-        )
-        ax_download.set_ylabel("Download (Mbps)", color=color_dl)
-        ax_download.tick_params(axis="y", labelcolor=color_dl)
-        ax_download.set_ylim(bottom=0)
+    # X軸のフォーマット（日時の単位変換を先に確定させる）
+    _set_open_hours_xaxis(ax_download, open_hour, close_hour, now=now)
 
-        # Ping（右軸）
-        ax_ping = ax_download.twinx()
-        color_ping = "#FF5722"
-        ax_ping.plot(
-            times, pings,
-            color=color_ping,
-            marker="s",
-            markersize=3,
-            linewidth=1.5,
-            label="Ping (ms)",
-        )
-        ax_ping.set_ylabel("Ping (ms)", color=color_ping)
-        ax_ping.tick_params(axis="y", labelcolor=color_ping)
-        ax_ping.set_ylim(bottom=0)
-
-        # X軸のフォーマット
-        _set_open_hours_xaxis(ax_download, open_hour, close_hour)
-
-        # 凡例を統合する
-        lines_dl, labels_dl = ax_download.get_legend_handles_labels()
-        lines_ping, labels_ping = ax_ping.get_legend_handles_labels()
-        ax_download.legend(
-            lines_dl + lines_ping,
-            labels_dl + labels_ping,
-            loc="upper right",
-        )
+    if recent:
+        # 日時文字列のパースと値の取り出しを1回の走査で行い、NumPy 配列に格納する
+        # （matplotlib は datetime64 をそのまま扱える）
+        n = len(recent)
+        times = np.empty(n, dtype="datetime64[us]")
+        downloads = np.empty(n, dtype=np.float32)
+        pings = np.empty(n, dtype=np.float32)
+        for i, r in enumerate(recent):
+            times[i] = _parse_iso_datetime_local(r["measured_at"])
+            downloads[i] = r["download_mbps"]
+            pings[i] = r["ping_ms"]
+
+        # ダウンロード速度（左軸）・Ping（右軸）
+        report.line_download.set_data(times, downloads)
+        report.line_ping.set_data(times, pings)
+        for ax, line, label in (
+            (ax_download, report.line_download, "Download (Mbps)"),
+            (ax_ping, report.line_ping, "Ping (ms)"),
+        ):
+            color = line.get_color()
+            ax.set_ylabel(label, color=color)
+            ax.tick_params(axis="y", labelcolor=color)
+            # 前回の set_ylim / set_yticks で固定された縦軸を自動に戻してから再計算する
+            ax.yaxis.set_major_locator(mticker.AutoLocator())
+            ax.set_autoscaley_on(True)
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+            ax.set_ylim(bottom=0)
     else:
-        # データがない場合のメッセージ
-        _set_open_hours_xaxis(ax_download, open_hour, close_hour)
-        ax_download.text(
-            0.5, 0.5,
-            "本日開館時間のデータなし",
-            transform=ax_download.transAxes,
-            ha="center",
-            va="center",
-            fontsize=14,
-            color="gray",
-        )
+        # データがない場合はメッセージのみ表示し、縦軸の目盛りを消す
+        report.line_download.set_data([], [])
+        report.line_ping.set_data([], [])
+        ax_download.set_ylabel("")
         ax_download.set_yticks([])
 
     ax_download.set_title(
@@ -401,7 +682,6 @@ def generate_heatmap(
     ax_download.set_xlabel("時刻")
 
     # === 下段: テキストサマリ ===
-    ax_summary = axes[2]
     ax_summary.axis("off")
     score_guide = build_score_explanation_text(config=config)
 
@@ -431,97 +711,177 @@ def generate_heatmap(
     )
 
     # レイアウト調整
-    plt.tight_layout(h_pad=2.0)
+    fig.tight_layout(h_pad=2.0)
 
     # 保存
-    fig.savefig(str(output_path), dpi=dpi, bbox_inches="tight")
-    plt.close(fig)
-
+    # Figure は次回の呼び出しで再利用するため閉じない
+    if is_png:
+        buf = _render_png_buffer(fig, dpi)
+        future = _SAVE_POOL.submit(_save_png, buf, output_path, dpi, input_hash)
+        if wait:
+            future.result()
+        return output_path
+
+    # PNG 以外の形式は matplotlib に任せる（入力ハッシュは埋め込まず、毎回描画する）
+    fig.savefig(output_path, dpi=dpi, bbox_inches="tight")
     logger.info("レポート画像を保存した: %s", output_path)
     return output_path
 
 
+def _report_input_hash(
+    config: dict,
+    days: int,
+    summary_text: str | None,
+    averages: _HourlyAverageArrays,
+    recent_measurements: list[dict],
+    today: date,
+) -> str:
+    """レポート画像の内容を決める入力からハッシュ値を求める.
+
+    描画に使う設定・集計結果・直近の計測結果・当日の日付が同じなら、同じ画像になる。
+    サマリを自動生成する場合は、その生成日時は入力に含めない
+    （画像を作り直さない限り、サマリには最後に生成した日時が残る）。
+
+    Args:
+        config: 設定辞書
+        days: ヒートマップの集計対象日数
+        summary_text: 明示指定されたサマリ文字列（自動生成の場合は None）
+        averages: 時間帯別平均
+        recent_measurements: 直近48時間の計測結果
+        today: 当日の日付
+
+    Returns:
+        16バイトの BLAKE2b ダイジェストの16進文字列
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for section in ("visualization", "cafe", "scoring"):
+        hasher.update(repr(config[section]).encode())
+    hasher.update(repr((days, summary_text, today.isoformat())).encode())
+    for column in averages:
+        hasher.update(column.tobytes())
+    hasher.update(repr(recent_measurements).encode())
+    return hasher.hexdigest()
+
+
+def _read_report_hash(output_path: Path) -> str | None:
+    """PNG に埋め込まれた入力ハッシュを読み込む.
+
+    画像のデコードは行わず、IDAT より前に置かれたテキストチャンクだけを読む。
+
+    Args:
+        output_path: PNG ファイルのパス
+
+    Returns:
+        入力ハッシュ。ファイルがない・読めない・埋め込まれていない場合は None
+    """
+    try:
+        with Image.open(output_path) as image:
+            return image.info.get(_INPUT_HASH_KEY)
+    except (OSError, ValueError):
+        return None
+
+
 def build_trend_summary_text(
     days: int = 28,
     config: dict | None = None,
     db_path: Path | None = None,
+    averages: list[dict] | _HourlyAverageArrays | None = None,
+    recent_48h: list[dict] | None = None,
+    now: datetime | None = None,
 ) -> str:
     """過去データから傾向サマリを生成する.
 
     欠損があっても要約できるよう、取得できたデータだけで集計する。
+
+    Args:
+        days: 集計対象日数（デフォルト28日）
+        config: 設定辞書
+        db_path: データベースファイルのパス
+        averages: 取得済みの get_hourly_averages() の結果、または _averages_to_soa() で
+            変換済みの値（省略時は DB から取得）
+        recent_48h: 取得済みの直近48時間の get_recent_measurements() の結果
+            （省略時は DB から取得）
+        now: 生成日時として表示するローカル時刻（省略時は現在時刻）
+
+    Returns:
+        サマリ文字列
     """
     if config is None:
         config = load_config()
+    if now is None:
+        now = datetime.now()
 
     cafe_config = config["cafe"]
     open_hour = cafe_config["open_hour"]
     close_hour = cafe_config["close_hour"]
     days_of_week = config["visualization"]["days_of_week"]
 
-    averages = get_hourly_averages(
-        days=days,
-        open_hour=open_hour,
-        close_hour=close_hour,
-        db_path=db_path,
-        config=config,
-    )
-    recent_48h = get_recent_measurements(hours=48, db_path=db_path, config=config)
+    if averages is None:
+        averages = get_hourly_averages(
+            days=days,
+            open_hour=open_hour,
+            close_hour=close_hour,
+            db_path=db_path,
+            config=config,
+        )
+    if recent_48h is None:
+        recent_48h = get_recent_measurements(hours=48, db_path=db_path, config=config)
 
     total_slots = len(days_of_week) * (close_hour - open_hour)
-    observed_slots = len(averages)
+    averages = _averages_to_soa(averages)
+    observed_slots = len(averages.hour)
     coverage = (observed_slots / total_slots * 100.0) if total_slots > 0 else 0.0
 
-    values_24h: list[float] = []
-    values_prev24h: list[float] = []
-    parsed_rows: list[tuple[datetime, float]] = []
-    for row in recent_48h:
-        score = row.get("comfort_score")
-        if score is None:
-            continue
-        measured = _parse_iso_datetime(row["measured_at"])
-        parsed_rows.append((measured, score))
+    # 直近48時間の計測結果を (日時, スコア) の配列にする（スコア欠損行は除く）
+    scored_rows = [row for row in recent_48h if row.get("comfort_score") is not None]
+    times_arr = np.array(
+        [_parse_iso_datetime(row["measured_at"]) for row in scored_rows],
+        dtype="datetime64[us]",
+    )
+    scores_arr = np.fromiter(
+        (row["comfort_score"] for row in scored_rows),
+        dtype=np.float64,
+        count=len(scored_rows),
+    )
 
-    if parsed_rows:
-        reference_time = max(measured for measured, _ in parsed_rows)
+    if times_arr.size:
+        reference_time = times_arr.max()
     else:
-        reference_time = datetime.utcnow()
-    cutoff = reference_time - timedelta(hours=24)
+        reference_time = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us")
+    cutoff = reference_time - np.timedelta64(24, "h")
+    mask_recent = times_arr >= cutoff
+    values_24h = scores_arr[mask_recent]
+    values_prev24h = scores_arr[~mask_recent]
 
-    for measured, score in parsed_rows:
-        if measured >= cutoff:
-            values_24h.append(score)
-        else:
-            values_prev24h.append(score)
-
-    by_hour: dict[int, list[float]] = {}
-    for entry in averages:
-        by_hour.setdefault(entry["hour"], []).append(entry["avg_score"])
+    # 時間帯ごとの平均（曜日をまたいだ avg_score の単純平均）を bincount で求める
+    hours_arr = averages.hour
+    avg_scores_arr = averages.avg_score
 
     best_hour_text = "データ不足"
     worst_hour_text = "データ不足"
-    if by_hour:
-        hour_avg = {
-            hour: sum(scores) / len(scores)
-            for hour, scores in by_hour.items()
-        }
-        best_hour, best_score = max(hour_avg.items(), key=lambda item: item[1])
-        worst_hour, worst_score = min(hour_avg.items(), key=lambda item: item[1])
-        best_hour_text = f"{best_hour}時台（平均 {best_score:.1f}）"
-        worst_hour_text = f"{worst_hour}時台（平均 {worst_score:.1f}）"
+    if hours_arr.size:
+        counts = np.bincount(hours_arr)
+        sums = np.bincount(hours_arr, weights=avg_scores_arr)
+        observed_hours = np.flatnonzero(counts)
+        hour_mean = sums[observed_hours] / counts[observed_hours]
+        best_idx = int(np.argmax(hour_mean))
+        worst_idx = int(np.argmin(hour_mean))
+        best_hour_text = f"{observed_hours[best_idx]}時台（平均 {hour_mean[best_idx]:.1f}）"
+        worst_hour_text = f"{observed_hours[worst_idx]}時台（平均 {hour_mean[worst_idx]:.1f}）"
 
     delta_text = "比較データ不足"
-    if values_24h and values_prev24h:
-        avg_24 = sum(values_24h) / len(values_24h)
-        avg_prev = sum(values_prev24h) / len(values_prev24h)
+    if values_24h.size and values_prev24h.size:
+        avg_24 = values_24h.mean()
+        avg_prev = values_prev24h.mean()
         delta = avg_24 - avg_prev
         trend = "改善" if delta >= 0 else "悪化"
         delta_text = f"{trend}（直近24h: {avg_24:.1f}, 前24h: {avg_prev:.1f}, 差分: {delta:+.1f}）"
-    elif values_24h:
-        avg_24 = sum(values_24h) / len(values_24h)
+    elif values_24h.size:
+        avg_24 = values_24h.mean()
         delta_text = f"直近24h平均のみ算出（{avg_24:.1f}）"
 
     lines = [
-        f"快適度トレンドサマリ（生成: {datetime.now().strftime('%Y-%m-%d %H:%M')}）",
+        f"快適度トレンドサマリ（生成: {now.strftime('%Y-%m-%d %H:%M')}）",
         f"対象期間: 過去{days}日 / 開館時間 {open_hour}:00-{close_hour}:00",
         f"観測カバレッジ: {observed_slots}/{total_slots} スロット（{coverage:.1f}%）",
         f"良好な時間帯: {best_hour_text}",
@@ -539,23 +899,49 @@ def build_score_explanation_text(config: dict | None = None) -> str:
 
     scoring = config["scoring"]
     weights = scoring["weights"]
-    labels = scoring["labels"]
+    # lru_cache のキーにするため、ハッシュ可能なタプルに変換する
+    labels_key = tuple(
+        (entry["min"], entry["max"], entry["label"]) for entry in scoring["labels"]
+    )
+    weights_key = (
+        weights["download"],
+        weights["upload"],
+        weights["ping"],
+        weights["jitter"],
+    )
+    return _render_score_guide(labels_key, weights_key)
+
 
+@functools.lru_cache(maxsize=4)
+def _render_score_guide(
+    labels: tuple[tuple[float, float, str], ...],
+    weights: tuple[float, float, float, float],
+) -> str:
+    """build_score_explanation_text() の実体. 評価帯と重みの組ごとに結果をキャッシュする.
+
+    Args:
+        labels: (min, max, label) のタプル
+        weights: (download, upload, ping, jitter) の重み
+
+    Returns:
+        スコアの見方の説明テキスト
+    """
+    dl, ul, ping, jitter = weights
     lines = [
         "快適度スコアの見方",
         "・0-100点（高いほど快適）",
         (
             "・重み: DL {dl:.0f}% / UL {ul:.0f}% / Ping {ping:.0f}% / Jitter {jitter:.0f}%".format(
-                dl=weights["download"] * 100,
-                ul=weights["upload"] * 100,
-                ping=weights["ping"] * 100,
-                jitter=weights["jitter"] * 100,
+                dl=dl * 100,
+                ul=ul * 100,
+                ping=ping * 100,
+                jitter=jitter * 100,
             )
         ),
         "・評価帯:",
     ]
-    for entry in sorted(labels, key=lambda x: x["min"], reverse=True):
-        lines.append(f"  {entry['min']}-{entry['max']}: {entry['label']}")
+    for low, high, label in sorted(labels, key=lambda x: x[0], reverse=True):
+        lines.append(f"  {low}-{high}: {label}")
     return "\n".join(lines)
 
 
@@ -577,10 +963,11 @@ def generate_trend_summary_file(
             output_path=None,
             filename_granularity=filename_granularity,
         )
+        # 出力先ディレクトリは _resolve_output_path() で作成済み
         summary = image_path.with_name(f"{image_path.stem}_summary.txt")
     else:
         summary = Path(summary_path)
-    summary.parent.mkdir(parents=True, exist_ok=True)
+        summary.parent.mkdir(parents=True, exist_ok=True)
 
     content = summary_text or build_trend_summary_text(days=days, config=config, db_path=db_path)
     summary.write_text(content, encoding="utf-8")
@@ -0,0 +1,70 @@
+"""テスト全体で共有するフィクスチャ.
+
+pytest-xdist で並列実行する場合、session スコープのフィクスチャはワーカーごとに作成される。
+"""
+
+import copy
+import shutil
+
+import matplotlib
+import pytest
+
+# どのテストモジュールより先に非対話バックエンドを設定する（各ワーカーでも同様）
+matplotlib.use("Agg")
+
+from src.config import load_config
+from src.storage import close_connections, init_db
+
+
+@pytest.fixture(scope="session")
+def config():
+    """テスト用設定を返す.
+
+    load_config() のキャッシュ済みの設定をセッション全体で共有する。
+    書き換えてはならない（書き換えるテストは mutable_config を使う）。
+    """
+    return load_config()
+
+
+@pytest.fixture
+def mutable_config(config):
+    """書き換え可能なテスト用設定を返す（テストごとに複製する）."""
+    return copy.deepcopy(config)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """テスト用の一時データベースパスを返す.
+
+    テスト内で init_db() などが開いた接続は、テスト後に閉じる。
+    """
+    path = tmp_path / "test.db"
+    yield path
+    close_connections(path)
+
+
+@pytest.fixture(scope="session")
+def _db_template(tmp_path_factory, config):
+    """スキーマ作成済みのテンプレート DB を一度だけ作成して返す.
+
+    initialized_db からのみ要求する（autouse にしない）。
+    DB を使わない scoring / collector のテストでは作成されない。
+    """
+    path = tmp_path_factory.mktemp("template") / "template.db"
+    init_db(db_path=path, config=config)
+    # 接続を閉じて WAL の内容を本体に書き戻してから、ファイルとして複製できるようにする
+    close_connections(path)
+    return path
+
+
+@pytest.fixture
+def initialized_db(db_path, _db_template):
+    """初期化済みのデータベースパスを返す.
+
+    テストごとに init_db() を実行せず、テンプレート DB をファイルコピーする。
+    接続はスレッドごと・パスごとにキャッシュされるため、テスト後に閉じて
+    削除済みの一時ファイルへの接続（WAL/SHM を含む）を残さない。
+    """
+    shutil.copyfile(_db_template, db_path)
+    yield db_path
+    close_connections(db_path)
@@ -0,0 +1,86 @@
+"""src/cli.py のテスト.
+
+計測・保存処理はモック化し、エントリポイントの分岐のみを確認する。
+"""
+
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from src.cli import parse_report_args, run_speedtest_main
+from src.collector import SpeedtestError
+from src.config import PROJECT_ROOT
+
+
+class TestParseReportArgs:
+    """parse_report_args のテストケース."""
+
+    def test_defaults(self):
+        """引数なしの場合はデフォルト値になる."""
+        args = parse_report_args([])
+        assert args.days == 28
+        assert args.output is None
+        assert args.granularity == "hourly"
+
+    def test_rejects_unknown_granularity(self):
+        """granularity に未定義の値を渡すとエラー終了する."""
+        with pytest.raises(SystemExit):
+            parse_report_args(["--granularity", "weekly"])
+
+
+class TestRunSpeedtestMain:
+    """run_speedtest_main のテストケース."""
+
+    @patch("src.cli._setup_logging")
+    @patch("src.cli.init_db")
+    @patch("src.cli.save_error", return_value=1)
+    @patch("src.cli.run_speedtest", side_effect=SpeedtestError("Network error"))
+    def test_records_error_and_exits(self, mock_run, mock_save_error, mock_init, mock_logging):
+        """計測失敗時はエラーを記録して終了コード 1 で終了する."""
+        with pytest.raises(SystemExit) as excinfo:
+            run_speedtest_main()
+        assert excinfo.value.code == 1
+        mock_save_error.assert_called_once()
+        assert "Network error" in mock_save_error.call_args[0][0]
+
+
+class TestImportFootprint:
+    """計測経路のインポートに関するテストケース."""
+
+    def test_measurement_path_does_not_import_heavy_modules(self):
+        """計測経路のモジュールは matplotlib / numpy などを読み込まない."""
+        code = (
+            "import sys; import src.cli; "
+            "heavy = [m for m in ('matplotlib', 'numpy', 'seaborn', 'pandas') if m in sys.modules]; "
+            "print(','.join(heavy))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            check=True,
+        )
+        assert proc.stdout.strip() == ""
+
+    def test_report_help_does_not_import_visualizer(self):
+        """report_main の --help は src.visualizer を読み込まずに終了する."""
+        code = (
+            "import sys; import src.cli; "
+            "src.cli._setup_logging = lambda: None; "
+            "sys.argv = ['speed-tracker-report', '--help']\n"
+            "try:\n"
+            "    src.cli.report_main()\n"
+            "except SystemExit as e:\n"
+            "    print(e.code, 'src.visualizer' in sys.modules)\n"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            check=True,
+        )
+        assert proc.stdout.strip().splitlines()[-1] == "0 False"
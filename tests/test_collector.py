@@ -3,16 +3,19 @@
 subprocess をモック化し、実際の Speedtest CLI を呼び出さずにテストする。
 """
 
+import functools
 import json
 import subprocess
+import time
 from unittest.mock import patch, MagicMock
 
 import pytest
 
-from src.config import load_config
+from src import collector
 from src.collector import (
     run_speedtest,
     _parse_result,
+    _parse_obj,
     _resolve_speedtest_command,
     SpeedtestError,
     SpeedtestTimeoutError,
@@ -21,14 +24,18 @@ from src.collector import (
 
 
 @pytest.fixture
-def config():
-    """テスト用設定を返す（再試行待機を短くする）."""
-    cfg = load_config()
+def config(mutable_config):
+    """テスト用設定を返す（再試行待機を短くする）.
+
+    共有の設定は書き換えられないため、テストごとの複製を書き換える。
+    """
+    cfg = mutable_config
     cfg["speedtest"]["retry_wait_sec"] = 0  # テスト高速化のため待機なし
     cfg["speedtest"]["retry_count"] = 3
     return cfg
 
 
+@functools.lru_cache(maxsize=8)
 def _make_speedtest_output(
     download_bandwidth: int = 12500000,
     upload_bandwidth: int = 6250000,
@@ -40,34 +47,57 @@ def _make_speedtest_output(
 ) -> str:
     """Speedtest CLI の JSON 出力をシミュレートするヘルパー.
 
+    _parse_result が読み取るフィールドのみを含む（実際の出力は _make_full_output を参照）。
     bandwidth は bytes/sec 単位である。
     12500000 bytes/sec = 100 Mbps
     6250000 bytes/sec = 50 Mbps
+    戻り値は不変の文字列のため、引数の組ごとにキャッシュして json.dumps を繰り返さない。
     """
     return json.dumps({
-        "type": "result",
         "timestamp": "2026-02-01T10:00:00Z",
         "ping": {
             "jitter": ping_jitter,
             "latency": ping_latency,
         },
+        "download": {"bandwidth": download_bandwidth},
+        "upload": {"bandwidth": upload_bandwidth},
+        "server": {
+            "id": server_id,
+            "name": server_name,
+        },
+        "isp": isp,
+        "result": {
+            "url": "https://www.speedtest.net/result/12345",
+        },
+    })
+
+
+def _make_full_output() -> str:
+    """実際の Speedtest CLI と同じく、読み取らないフィールドも含む JSON 出力を返す."""
+    return json.dumps({
+        "type": "result",
+        "timestamp": "2026-02-01T10:00:00Z",
+        "ping": {
+            "jitter": 3.0,
+            "latency": 15.0,
+        },
         "download": {
-            "bandwidth": download_bandwidth,
+            "bandwidth": 12500000,
             "bytes": 125000000,
             "elapsed": 10000,
         },
         "upload": {
-            "bandwidth": upload_bandwidth,
+            "bandwidth": 6250000,
             "bytes": 62500000,
             "elapsed": 10000,
         },
         "server": {
-            "id": server_id,
-            "name": server_name,
+            "id": 12345,
+            "name": "Test Server",
             "location": "Tokyo",
             "country": "Japan",
         },
-        "isp": isp,
+        "isp": "Test ISP",
         "result": {
             "url": "https://www.speedtest.net/result/12345",
         },
@@ -75,11 +105,14 @@ def _make_speedtest_output(
 
 
 class TestParseResult:
-    """_parse_result のテストケース."""
+    """_parse_result / _parse_obj のテストケース.
+
+    JSON 文字列の扱いを確認するテスト以外は、辞書を _parse_obj に直接渡す。
+    """
 
     def test_parses_valid_json(self):
-        """正常な JSON を正しくパースする."""
-        raw = _make_speedtest_output()
+        """正常な JSON を正しくパースする（読み取らないフィールドは無視される）."""
+        raw = _make_full_output()
         result = _parse_result(raw)
 
         # bandwidth(bytes/sec) × 8 = bits/sec
@@ -92,6 +125,32 @@ class TestParseResult:
         assert result["isp"] == "Test ISP"
         assert result["result_url"] == "https://www.speedtest.net/result/12345"
         assert result["raw_json"] == raw
+        assert result["timestamp"] == "2026-02-01T10:00:00Z"
+        assert result["timestamp_ts"] == 1769940000
+
+    def test_normalizes_timestamp_offset_to_utc(self):
+        """オフセット付きの timestamp は UTC の Z 表記に正規化される."""
+        data = {
+            "timestamp": "2026-02-01T19:00:00+09:00",
+            "ping": {"latency": 10.0, "jitter": 1.0},
+            "download": {"bandwidth": 1000000},
+            "upload": {"bandwidth": 500000},
+        }
+        result = _parse_obj(data)
+        assert result["timestamp"] == "2026-02-01T10:00:00Z"
+        assert result["timestamp_ts"] == 1769940000
+
+    def test_invalid_timestamp_falls_back_to_now(self):
+        """解釈できない timestamp の場合は現在時刻で代用する."""
+        data = {
+            "timestamp": "not a timestamp",
+            "ping": {"latency": 10.0, "jitter": 1.0},
+            "download": {"bandwidth": 1000000},
+            "upload": {"bandwidth": 500000},
+        }
+        result = _parse_obj(data)
+        assert result["timestamp"].endswith("Z")
+        assert abs(result["timestamp_ts"] - time.time()) < 60
 
     def test_raises_on_invalid_json(self):
         """不正な JSON でパースエラーを送出する."""
@@ -104,30 +163,78 @@ class TestParseResult:
         with pytest.raises(SpeedtestParseError, match="必須フィールド"):
             _parse_result('{"ping": {"latency": 10, "jitter": 1}}')
 
+    def test_missing_fields_are_listed(self):
+        """欠落した必須フィールドがエラーメッセージに列挙される."""
+        data = {
+            "ping": {"latency": 10.0},
+            "download": None,
+            "upload": {"bandwidth": 500000},
+        }
+        with pytest.raises(SpeedtestParseError) as excinfo:
+            _parse_obj(data)
+        message = str(excinfo.value)
+        assert "download.bandwidth" in message
+        assert "ping.jitter" in message
+        assert "upload.bandwidth" not in message
+
+    @pytest.mark.parametrize(
+        "field, value",
+        [
+            ("download", {"bandwidth": "abc"}),
+            ("ping", {"latency": "10", "jitter": 1.0}),
+            ("upload", {"bandwidth": True}),
+        ],
+    )
+    def test_raises_on_non_numeric_fields(self, field, value):
+        """必須フィールドが数値でない場合はパースエラーになる."""
+        data = {
+            "ping": {"latency": 10.0, "jitter": 1.0},
+            "download": {"bandwidth": 1000000},
+            "upload": {"bandwidth": 500000},
+        }
+        data[field] = value
+        with pytest.raises(SpeedtestParseError, match="数値ではない"):
+            _parse_obj(data)
+
+    def test_raises_on_non_object_json(self):
+        """トップレベルがオブジェクトでない JSON はパースエラーになる."""
+        with pytest.raises(SpeedtestParseError):
+            _parse_obj([1, 2, 3])
+
     def test_handles_missing_optional_fields(self):
         """オプショナルフィールドが欠落しても正常にパースされる."""
-        raw = json.dumps({
+        data = {
             "ping": {"latency": 10.0, "jitter": 1.0},
             "download": {"bandwidth": 1000000},
             "upload": {"bandwidth": 500000},
-        })
-        result = _parse_result(raw)
+        }
+        result = _parse_obj(data)
         assert result["server_id"] is None
         assert result["server_name"] is None
         assert result["isp"] is None
         assert result["result_url"] is None
+        # 元の JSON 文字列がないため raw_json は設定されない
+        assert result["raw_json"] is None
 
 
 class TestRunSpeedtest:
     """run_speedtest のテストケース."""
 
-    @patch("src.collector.subprocess.run")
+    @pytest.fixture
+    def mock_run(self):
+        """subprocess.run をモック化する.
+
+        再試行間の time.sleep も無効にし、待機設定によらずテストが待たないようにする。
+        """
+        with patch("src.collector.subprocess.run") as mock_run, patch("src.collector.time.sleep"):
+            yield mock_run
+
     def test_successful_run(self, mock_run, config):
         """正常な計測結果を返す."""
         mock_run.return_value = MagicMock(
             returncode=0,
-            stdout=_make_speedtest_output(),
-            stderr="",
+            stdout=_make_speedtest_output().encode(),
+            stderr=b"",
         )
 
         result = run_speedtest(config=config)
@@ -135,17 +242,19 @@ class TestRunSpeedtest:
         assert result["download_bps"] == 12500000 * 8
         assert result["ping_ms"] == 15.0
         mock_run.assert_called_once()
+        # バイト列のまま受け取り、raw_json は文字列として保持する
+        assert mock_run.call_args.kwargs["text"] is False
+        assert result["raw_json"] == _make_speedtest_output()
 
-    @patch("src.collector.subprocess.run")
     def test_retries_on_failure(self, mock_run, config):
         """失敗時にリトライし、最終的に成功する."""
         # 1回目: 失敗、2回目: 成功
         mock_run.side_effect = [
-            MagicMock(returncode=1, stdout="", stderr="Network error"),
+            MagicMock(returncode=1, stdout=b"", stderr=b"Network error"),
             MagicMock(
                 returncode=0,
-                stdout=_make_speedtest_output(),
-                stderr="",
+                stdout=_make_speedtest_output().encode(),
+                stderr=b"",
             ),
         ]
 
@@ -153,30 +262,27 @@ class TestRunSpeedtest:
         assert result["download_bps"] == 12500000 * 8
         assert mock_run.call_count == 2
 
-    @patch("src.collector.subprocess.run")
     def test_raises_after_all_retries_fail(self, mock_run, config):
         """全リトライ失敗後にエラーを送出する."""
         mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="Connection refused"
+            returncode=1, stdout=b"", stderr=b"Connection refused"
         )
 
         with pytest.raises(SpeedtestError):
             run_speedtest(config=config)
         assert mock_run.call_count == config["speedtest"]["retry_count"]
 
-    @patch("src.collector.subprocess.run")
     def test_adds_dns_hint_on_host_not_found(self, mock_run, config):
         """HostNotFoundException の場合はDNS確認ヒントを含める."""
         mock_run.return_value = MagicMock(
             returncode=2,
-            stdout="",
-            stderr="Configuration - A server with the specified hostname could not be found. (HostNotFoundException)",
+            stdout=b"",
+            stderr=b"Configuration - A server with the specified hostname could not be found. (HostNotFoundException)",
         )
 
         with pytest.raises(SpeedtestError, match="DNS解決"):
             run_speedtest(config=config)
 
-    @patch("src.collector.subprocess.run")
     def test_timeout_handling(self, mock_run, config):
         """タイムアウト時に SpeedtestTimeoutError を送出する."""
         mock_run.side_effect = subprocess.TimeoutExpired(
@@ -186,13 +292,12 @@ class TestRunSpeedtest:
         with pytest.raises(SpeedtestTimeoutError):
             run_speedtest(config=config)
 
-    @patch("src.collector.subprocess.run")
     def test_parse_error_no_retry(self, mock_run, config):
         """パースエラーはリトライせず即座に送出する."""
         mock_run.return_value = MagicMock(
             returncode=0,
-            stdout="not valid json",
-            stderr="",
+            stdout=b"not valid json",
+            stderr=b"",
         )
 
         with pytest.raises(SpeedtestParseError):
@@ -200,14 +305,13 @@ class TestRunSpeedtest:
         # パースエラーはリトライしないため1回のみ
         assert mock_run.call_count == 1
 
-    @patch("src.collector.subprocess.run")
     def test_command_from_config(self, mock_run, config):
         """設定からコマンドが正しく構築される."""
         config["speedtest"]["command"] = "/usr/local/bin/speedtest"
         mock_run.return_value = MagicMock(
             returncode=0,
-            stdout=_make_speedtest_output(),
-            stderr="",
+            stdout=_make_speedtest_output().encode(),
+            stderr=b"",
         )
 
         run_speedtest(config=config)
@@ -221,13 +325,17 @@ class TestRunSpeedtest:
 class TestResolveSpeedtestCommand:
     """_resolve_speedtest_command のテストケース."""
 
-    @patch("src.collector.shutil.which")
+    @pytest.fixture
+    def mock_which(self):
+        """shutil.which をモック化する（戻り値は各テストで side_effect に設定する）."""
+        with patch.object(collector.shutil, "which") as mock_which:
+            yield mock_which
+
     def test_resolve_from_path(self, mock_which):
         """PATH 上で見つかる場合はそのパスを返す."""
         mock_which.side_effect = lambda cmd: "/mock/bin/speedtest" if cmd == "speedtest" else None
         assert _resolve_speedtest_command("speedtest") == "/mock/bin/speedtest"
 
-    @patch("src.collector.shutil.which")
     def test_resolve_from_fallback(self, mock_which):
         """PATH 上で見つからない場合に既知パスを利用する."""
         def which_side_effect(cmd):
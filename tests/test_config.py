@@ -0,0 +1,73 @@
+"""src/config.py のテスト."""
+
+import pytest
+
+from src.config import DEFAULT_CONFIG, _deep_merge, load_config, reload_config
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """テスト用の設定ファイルを作成してパスを返す."""
+    path = tmp_path / "config.yaml"
+    path.write_text("cafe:\n  open_hour: 10\n", encoding="utf-8")
+    return path
+
+
+class TestLoadConfig:
+    """load_config のテストケース."""
+
+    def test_merges_with_defaults(self, config_file):
+        """ユーザ設定がデフォルト値にマージされる."""
+        config = reload_config(str(config_file))
+        assert config["cafe"]["open_hour"] == 10
+        assert config["cafe"]["close_hour"] == DEFAULT_CONFIG["cafe"]["close_hour"]
+
+    def test_returns_cached_result(self, config_file):
+        """同じ引数での2回目以降はキャッシュ済みの辞書を返す."""
+        first = load_config(str(config_file))
+        # ファイルを書き換えてもキャッシュが優先される
+        config_file.write_text("cafe:\n  open_hour: 11\n", encoding="utf-8")
+        second = load_config(str(config_file))
+        assert second is first
+
+    def test_reload_config_rereads_file(self, config_file):
+        """reload_config はキャッシュを破棄してファイルを再読み込みする."""
+        load_config(str(config_file))
+        config_file.write_text("cafe:\n  open_hour: 11\n", encoding="utf-8")
+        config = reload_config(str(config_file))
+        assert config["cafe"]["open_hour"] == 11
+
+    def test_env_var_is_part_of_cache_key(self, config_file, tmp_path, monkeypatch):
+        """ST_CONFIG_PATH を切り替えると別の設定として読み込まれる."""
+        other = tmp_path / "other.yaml"
+        other.write_text("cafe:\n  open_hour: 8\n", encoding="utf-8")
+
+        monkeypatch.setenv("ST_CONFIG_PATH", str(config_file))
+        assert load_config()["cafe"]["open_hour"] == 10
+        monkeypatch.setenv("ST_CONFIG_PATH", str(other))
+        assert load_config()["cafe"]["open_hour"] == 8
+
+    def test_missing_file_returns_defaults(self, tmp_path):
+        """ファイルが存在しない場合はデフォルト値を返す."""
+        config = reload_config(str(tmp_path / "missing.yaml"))
+        assert config == DEFAULT_CONFIG
+        assert config is not DEFAULT_CONFIG
+
+
+class TestDeepMerge:
+    """_deep_merge のテストケース."""
+
+    def test_does_not_share_containers_with_base(self):
+        """マージ結果の dict/list はデフォルト値と共有されない."""
+        merged = _deep_merge(DEFAULT_CONFIG, {"cafe": {"open_hour": 10}})
+        merged["scoring"]["labels"][0]["label"] = "変更"
+        merged["visualization"]["days_of_week"].append("祝")
+        assert DEFAULT_CONFIG["scoring"]["labels"][0]["label"] == "非常に快適"
+        assert len(DEFAULT_CONFIG["visualization"]["days_of_week"]) == 7
+
+    def test_override_replaces_lists(self):
+        """リストは再帰マージせず、上書き側の値で置き換える."""
+        override = {"visualization": {"days_of_week": ["Mon", "Tue"]}}
+        merged = _deep_merge(DEFAULT_CONFIG, override)
+        assert merged["visualization"]["days_of_week"] == ["Mon", "Tue"]
+        assert merged["visualization"]["days_of_week"] is not override["visualization"]["days_of_week"]
@@ -1,15 +1,14 @@
 """src/scoring.py のテスト."""
 
-import pytest
+import copy
 
-from src.config import load_config
-from src.scoring import calculate_comfort_score, get_comfort_label
+import numpy as np
 
-
-@pytest.fixture
-def config():
-    """テスト用設定を返す."""
-    return load_config()
+from src.scoring import (
+    calculate_comfort_score,
+    calculate_comfort_scores_batch,
+    get_comfort_label,
+)
 
 
 class TestCalculateComfortScore:
@@ -107,6 +106,77 @@ class TestCalculateComfortScore:
         # 結果が小数第1位であることを確認
         assert score == round(score, 1)
 
+    def test_modified_copy_uses_new_weights(self, config):
+        """複製して重みを書き換えた設定では、書き換え後の重みが使われる."""
+        modified = copy.deepcopy(config)
+        modified["scoring"]["weights"] = {
+            "download": 1.0,
+            "upload": 0.0,
+            "ping": 0.0,
+            "jitter": 0.0,
+        }
+        score = calculate_comfort_score(
+            download_mbps=50.0,
+            upload_mbps=0.0,
+            ping_ms=100.0,
+            jitter_ms=50.0,
+            config=modified,
+        )
+        assert score == 50.0
+
+    def test_modified_in_place_uses_new_weights(self, mutable_config):
+        """scoring をその場で書き換えた場合も、書き換え後の重みが使われる."""
+        kwargs = dict(download_mbps=50.0, upload_mbps=0.0, ping_ms=100.0, jitter_ms=50.0)
+        before = calculate_comfort_score(**kwargs, config=mutable_config)
+        mutable_config["scoring"]["weights"].update(
+            {"download": 1.0, "upload": 0.0, "ping": 0.0, "jitter": 0.0}
+        )
+        assert calculate_comfort_score(**kwargs, config=mutable_config) == 50.0
+        assert before != 50.0
+
+    def test_config_without_load_config(self, config):
+        """load_config() を経由しない手組みの設定でも算出できる."""
+        score = calculate_comfort_score(
+            download_mbps=50.0,
+            upload_mbps=25.0,
+            ping_ms=50.0,
+            jitter_ms=25.0,
+            config={"scoring": config["scoring"]},
+        )
+        assert score == 50.0
+
+
+class TestCalculateComfortScoresBatch:
+    """calculate_comfort_scores_batch のテストケース."""
+
+    def test_matches_scalar_version(self, config):
+        """各要素がスカラ版と同じスコアになる."""
+        samples = [
+            (100.0, 50.0, 0.0, 0.0),
+            (0.0, 0.0, 100.0, 50.0),
+            (200.0, 100.0, 0.0, 0.0),
+            (50.0, 25.0, 50.0, 25.0),
+            (33.3, 12.7, 18.4, 4.2),
+            (80.0, 40.0, 150.0, 80.0),
+        ]
+        download, upload, ping, jitter = (np.array(col) for col in zip(*samples))
+
+        scores = calculate_comfort_scores_batch(download, upload, ping, jitter, config)
+
+        expected = [calculate_comfort_score(*sample, config=config) for sample in samples]
+        assert scores.tolist() == expected
+
+    def test_accepts_lists(self, config):
+        """list を渡しても ndarray が返る."""
+        scores = calculate_comfort_scores_batch([50.0], [25.0], [50.0], [25.0], config)
+        assert isinstance(scores, np.ndarray)
+        assert scores.tolist() == [50.0]
+
+    def test_empty_input(self, config):
+        """空配列を渡すと空配列が返る."""
+        scores = calculate_comfort_scores_batch([], [], [], [], config)
+        assert scores.shape == (0,)
+
 
 class TestGetComfortLabel:
     """get_comfort_label のテストケース."""
@@ -154,3 +224,50 @@ class TestGetComfortLabel:
         """0-100 範囲外の値は丸めて分類される."""
         assert get_comfort_label(120.0, config) == "非常に快適"
         assert get_comfort_label(-5.0, config) == "不快"
+
+    def test_unsorted_labels(self):
+        """labels が min 順に並んでいなくても正しく分類される."""
+        config = {
+            "scoring": {
+                "weights": {"download": 0.25, "upload": 0.25, "ping": 0.25, "jitter": 0.25},
+                "thresholds": {
+                    "download_max_mbps": 100,
+                    "upload_max_mbps": 50,
+                    "ping_max_ms": 100,
+                    "jitter_max_ms": 50,
+                },
+                "labels": [
+                    {"min": 50, "max": 100, "label": "良"},
+                    {"min": 0, "max": 24, "label": "悪"},
+                    {"min": 25, "max": 49, "label": "可"},
+                ],
+            }
+        }
+        assert get_comfort_label(10.0, config) == "悪"
+        assert get_comfort_label(25.0, config) == "可"
+        assert get_comfort_label(99.0, config) == "良"
+
+    def test_score_below_all_labels_returns_unknown(self, config):
+        """すべての min を下回る場合は '不明' を返す."""
+        modified = copy.deepcopy(config)
+        modified["scoring"]["labels"] = [{"min": 10, "max": 100, "label": "可"}]
+        assert get_comfort_label(5.0, modified) == "不明"
+
+    def test_labels_only_scoring_section(self):
+        """weights / thresholds を持たず labels だけの scoring セクションでも分類できる."""
+        config = {
+            "scoring": {
+                "labels": [
+                    {"min": 0, "max": 49, "label": "悪"},
+                    {"min": 50, "max": 100, "label": "良"},
+                ],
+            }
+        }
+        assert get_comfort_label(10.0, config) == "悪"
+        assert get_comfort_label(80.0, config) == "良"
+
+    def test_labels_edited_in_place(self, mutable_config):
+        """labels をその場で書き換えた場合は、書き換え後のラベルが使われる."""
+        assert get_comfort_label(95.0, mutable_config) == "非常に快適"
+        mutable_config["scoring"]["labels"][0]["label"] = "最高"
+        assert get_comfort_label(95.0, mutable_config) == "最高"
@@ -2,40 +2,99 @@
 
 from __future__ import annotations
 
+import functools
 import sqlite3
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
 
-from src.config import load_config
 from src.storage import (
+    _RECENT_MEASUREMENTS_SQL,
+    _get_connection,
+    close_connections,
     init_db,
     save_measurement,
+    save_measurements_bulk,
     save_error,
+    get_raw_json,
     get_hourly_averages,
     get_recent_measurements,
     cleanup_old_data,
 )
 
 
-@pytest.fixture
-def config():
-    """テスト用設定を返す."""
-    return load_config()
+# テストで基準にする現在時刻（UTC naive）
+# 行ごと・テストごとに時刻を取り直さず、モジュール内のデータはこの時刻からの相対で作る。
+# 保存期間や直近 N 時間の判定は storage 側の実時刻で行われるため、固定日付ではなく
+# import 時点の時刻を使う（テスト全体の実行時間はこれらの判定幅より十分短い）
+NOW = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+@functools.lru_cache(maxsize=None)
+def _iso(offset_hours: int = 0) -> str:
+    """NOW から offset_hours 時間ずらした日時の ISO 8601 文字列を返す（負の値で過去）.
+
+    collector が保存する measured_at と同じく、末尾 Z の UTC 表記にする。
+    """
+    return (NOW + timedelta(hours=offset_hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# 初期バージョンのスキーマ（既存 DB からの移行テスト用）
+_LEGACY_SCHEMA_SQL = """
+CREATE TABLE measurements (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    measured_at     TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'ok',
+    download_mbps   REAL,
+    upload_mbps     REAL,
+    ping_ms         REAL,
+    jitter_ms       REAL,
+    comfort_score   REAL,
+    server_id       INTEGER,
+    server_name     TEXT,
+    isp             TEXT,
+    result_url      TEXT,
+    error_message   TEXT,
+    raw_json        TEXT,
+    created_at      TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX idx_measurements_measured_at ON measurements(measured_at);
+CREATE INDEX idx_measurements_status ON measurements(status);
+"""
 
 
 @pytest.fixture
-def db_path(tmp_path):
-    """テスト用の一時データベースパスを返す."""
-    return tmp_path / "test.db"
+def mem_db(config):
+    """初期化済みのインメモリ DB の URI を返す.
+
+    DB ファイルを直接開かないテストで使い、ディスクへの書き込みを省く。
+    """
+    uri = f"file:mem_{uuid.uuid4().hex}?mode=memory&cache=shared"
+    init_db(db_path=uri, config=config)
+    yield uri
+    # 最後の接続を閉じるとインメモリ DB も破棄される
+    close_connections(uri)
 
 
 @pytest.fixture
-def initialized_db(db_path, config):
-    """初期化済みのデータベースパスを返す."""
-    init_db(db_path=db_path, config=config)
-    return db_path
+def db_conn(initialized_db):
+    """initialized_db を読み取り専用で開いた接続を返す（保存結果の確認用）.
+
+    行は sqlite3.Row で返すため、列名で参照できる。
+    """
+    conn = sqlite3.connect(f"{initialized_db.as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def _create_legacy_db(db_path: Path) -> None:
+    """初期バージョンのスキーマで DB を作成するヘルパー."""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(_LEGACY_SCHEMA_SQL)
+    conn.close()
 
 
 def _make_measurement(
@@ -48,7 +107,7 @@ def _make_measurement(
 ) -> dict:
     """テスト用の計測データを生成するヘルパー."""
     if measured_at is None:
-        measured_at = datetime.utcnow().isoformat()
+        measured_at = _iso()
     return {
         "measured_at": measured_at,
         "download_mbps": download_mbps,
@@ -93,59 +152,261 @@ class TestInitDb:
         """親ディレクトリが存在しない場合でも作成される."""
         nested_path = tmp_path / "nested" / "dir" / "test.db"
         init_db(db_path=nested_path, config=config)
+        close_connections(nested_path)
         assert nested_path.exists()
 
+    def test_creates_covering_index(self, db_path, config):
+        """集計用の複合インデックスが作成され、単独の status インデックスは削除される."""
+        _create_legacy_db(db_path)
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        names = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT measured_at_ts, comfort_score FROM measurements "
+                "WHERE status = 'ok' AND measured_at_ts >= ?",
+                (0,),
+            )
+        )
+        conn.close()
+        assert "idx_measurements_status_ts" in names
+        assert "idx_measurements_status" not in names
+        assert "COVERING INDEX idx_measurements_status_ts" in plan
+
+    def test_time_range_queries_use_epoch_indexes(self, db_path, config):
+        """直近取得と保存期間の削除は measured_at_ts のインデックスで絞り込む."""
+        _create_legacy_db(db_path)
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        names = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+        recent_plan = " ".join(
+            row[-1]
+            for row in conn.execute(f"EXPLAIN QUERY PLAN {_RECENT_MEASUREMENTS_SQL}", (0,))
+        )
+        delete_plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN DELETE FROM measurements WHERE measured_at_ts < ?", (0,)
+            )
+        )
+        conn.close()
+        assert "idx_measurements_measured_at" not in names
+        assert "USING INDEX idx_measurements_status_ts" in recent_plan
+        assert "TEMP B-TREE" not in recent_plan
+        assert "idx_measurements_ts" in delete_plan
+
+    def test_migrates_legacy_rows_to_epoch(self, db_path, config):
+        """既存 DB の行に measured_at_ts が補完され、user_version が更新される."""
+        _create_legacy_db(db_path)
+        conn = sqlite3.connect(str(db_path))
+        conn.executemany(
+            "INSERT INTO measurements (measured_at, comfort_score) VALUES (?, 80.0)",
+            [("2026-02-02T01:00:00Z",), ("2026-02-02T10:00:00",)],
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        epochs = [row[0] for row in conn.execute("SELECT measured_at_ts FROM measurements ORDER BY id")]
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        # タイムゾーンなしの値はカフェのローカル時刻（UTC+9）として扱う
+        expected = int(datetime(2026, 2, 2, 1, 0, tzinfo=timezone.utc).timestamp())
+        assert epochs == [expected, expected]
+        assert version >= 1
+
+    def test_migrates_legacy_error_rows_as_utc(self, db_path, config):
+        """旧版の save_error が書いたタイムゾーンなしのエラー行は UTC として補完される."""
+        _create_legacy_db(db_path)
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(
+            "INSERT INTO measurements (measured_at, status, error_message) VALUES (?, 'error', ?)",
+            ("2026-02-02T01:00:00", "Network error"),
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        epoch = conn.execute("SELECT measured_at_ts FROM measurements").fetchone()[0]
+        conn.close()
+        assert epoch == int(datetime(2026, 2, 2, 1, 0, tzinfo=timezone.utc).timestamp())
+
+    def test_migration_skips_unparsable_rows(self, db_path, config):
+        """解釈できない measured_at の行は NULL のまま残し、他の行の移行は続ける."""
+        _create_legacy_db(db_path)
+        conn = sqlite3.connect(str(db_path))
+        conn.executemany(
+            "INSERT INTO measurements (measured_at, comfort_score) VALUES (?, 80.0)",
+            [("not a timestamp",), ("2026-02-02T01:00:00Z",)],
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        epochs = [row[0] for row in conn.execute("SELECT measured_at_ts FROM measurements ORDER BY id")]
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        expected = int(datetime(2026, 2, 2, 1, 0, tzinfo=timezone.utc).timestamp())
+        assert epochs == [None, expected]
+        assert version >= 1
+
+    def test_migrates_raw_json_to_sidecar_table(self, db_path, config):
+        """既存 DB の raw_json は measurements_raw へ移され、列は削除される."""
+        _create_legacy_db(db_path)
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(
+            "INSERT INTO measurements (measured_at, raw_json) VALUES (?, ?)",
+            ("2026-02-02T01:00:00Z", '{"legacy": true}'),
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(measurements)")}
+        conn.close()
+        assert "raw_json" not in columns
+        assert get_raw_json(1, db_path=db_path, config=config) == '{"legacy": true}'
+
+    def test_enables_wal_mode(self, db_path, config):
+        """journal_mode が WAL に設定される."""
+        init_db(db_path=db_path, config=config)
+        conn = sqlite3.connect(str(db_path))
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        assert mode == "wal"
+
+    def test_accepts_memory_uri(self, tmp_path, config, monkeypatch):
+        """file: URI を指定するとファイルを作らずにインメモリ DB を初期化する."""
+        monkeypatch.chdir(tmp_path)
+        uri = f"file:mem_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        try:
+            assert init_db(db_path=uri, config=config) == uri
+            row_id = save_measurement(_make_measurement(), db_path=uri, config=config)
+            assert get_raw_json(row_id, db_path=uri, config=config) == '{"test": true}'
+        finally:
+            close_connections(uri)
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestConnectionCache:
+    """接続キャッシュ（_get_connection / close_connections）のテストケース."""
+
+    def test_reuses_connection_for_same_path(self, initialized_db, config):
+        """同じ DB パスには同じ接続を返す."""
+        first = _get_connection(initialized_db, config)
+        second = _get_connection(initialized_db, config)
+        assert first is second
+
+    def test_close_connections_reopens(self, initialized_db, config):
+        """close_connections 後は新しい接続が作成される."""
+        first = _get_connection(initialized_db, config)
+        close_connections(initialized_db)
+        with pytest.raises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
+        second = _get_connection(initialized_db, config)
+        assert second is not first
+        assert second.execute("SELECT 1").fetchone()[0] == 1
+
 
 class TestSaveMeasurement:
     """save_measurement のテストケース."""
 
-    def test_saves_and_returns_id(self, initialized_db, config):
+    def test_saves_and_returns_id(self, mem_db, config):
         """計測結果を保存し、行IDを返す."""
         data = _make_measurement()
-        row_id = save_measurement(data, db_path=initialized_db, config=config)
+        row_id = save_measurement(data, db_path=mem_db, config=config)
         assert isinstance(row_id, int)
         assert row_id > 0
 
-    def test_saved_data_is_correct(self, initialized_db, config):
+    def test_saved_data_is_correct(self, initialized_db, db_conn, config):
         """保存されたデータが正しい値を持つ."""
         data = _make_measurement(download_mbps=95.5, ping_ms=12.3)
         row_id = save_measurement(data, db_path=initialized_db, config=config)
 
-        conn = sqlite3.connect(str(initialized_db))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM measurements WHERE id = ?", (row_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = db_conn.execute("SELECT * FROM measurements WHERE id = ?", (row_id,)).fetchone()
 
         assert row["status"] == "ok"
         assert row["download_mbps"] == 95.5
         assert row["ping_ms"] == 12.3
 
-    def test_multiple_saves(self, initialized_db, config):
+    def test_raw_json_is_stored_separately(self, mem_db, config):
+        """raw_json は measurements_raw に保存され、get_raw_json で取得できる."""
+        row_id = save_measurement(_make_measurement(), db_path=mem_db, config=config)
+        assert get_raw_json(row_id, db_path=mem_db, config=config) == '{"test": true}'
+
+    def test_raw_json_is_optional(self, mem_db, config):
+        """raw_json がない場合は get_raw_json が None を返す."""
+        data = _make_measurement()
+        del data["raw_json"]
+        row_id = save_measurement(data, db_path=mem_db, config=config)
+        assert get_raw_json(row_id, db_path=mem_db, config=config) is None
+
+    def test_uses_given_epoch(self, initialized_db, db_conn, config):
+        """measured_at_ts が渡された場合はその値をそのまま保存する."""
+        data = _make_measurement(measured_at="2026-02-01T10:00:00Z")
+        data["measured_at_ts"] = 1769940000
+        row_id = save_measurement(data, db_path=initialized_db, config=config)
+
+        saved = db_conn.execute(
+            "SELECT measured_at_ts FROM measurements WHERE id = ?", (row_id,)
+        ).fetchone()[0]
+        assert saved == 1769940000
+
+    def test_multiple_saves(self, mem_db, config):
         """複数回保存できる."""
         ids = []
         for i in range(5):
             data = _make_measurement(download_mbps=float(50 + i * 10))
-            ids.append(save_measurement(data, db_path=initialized_db, config=config))
+            ids.append(save_measurement(data, db_path=mem_db, config=config))
         assert len(set(ids)) == 5  # すべてユニークなID
 
 
+class TestSaveMeasurementsBulk:
+    """save_measurements_bulk のテストケース."""
+
+    def test_saves_all_rows_and_returns_ids(self, initialized_db, db_conn, config):
+        """全行を保存し、入力順に対応する行IDを返す."""
+        rows = [_make_measurement(download_mbps=float(10 + i)) for i in range(5)]
+        ids = save_measurements_bulk(rows, db_path=initialized_db, config=config)
+        assert len(ids) == 5
+
+        saved = dict(db_conn.execute("SELECT id, download_mbps FROM measurements").fetchall())
+        assert [saved[row_id] for row_id in ids] == [10.0, 11.0, 12.0, 13.0, 14.0]
+
+    def test_empty_rows(self, mem_db, config):
+        """空リストの場合は何も保存せず空リストを返す."""
+        assert save_measurements_bulk([], db_path=mem_db, config=config) == []
+        assert get_recent_measurements(db_path=mem_db, config=config) == []
+
+
 class TestSaveError:
     """save_error のテストケース."""
 
-    def test_saves_error_record(self, initialized_db, config):
+    def test_saves_error_record(self, mem_db, config):
         """エラー記録を保存する."""
         row_id = save_error(
             "Connection timed out",
             raw_output="stderr output",
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
         assert isinstance(row_id, int)
         assert row_id > 0
 
-    def test_error_status_is_set(self, initialized_db, config):
+    def test_error_status_is_set(self, initialized_db, db_conn, config):
         """status が 'error' に設定される."""
         row_id = save_error(
             "Network error",
@@ -153,28 +414,43 @@ class TestSaveError:
             config=config,
         )
 
-        conn = sqlite3.connect(str(initialized_db))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM measurements WHERE id = ?", (row_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = db_conn.execute("SELECT * FROM measurements WHERE id = ?", (row_id,)).fetchone()
 
         assert row["status"] == "error"
         assert row["error_message"] == "Network error"
         assert row["download_mbps"] is None
         assert row["comfort_score"] is None
 
+    def test_measured_at_uses_collector_utc_format(self, initialized_db, db_conn, config):
+        """measured_at は collector と同じ末尾 Z の UTC 表記で保存される."""
+        row_id = save_error("Network error", db_path=initialized_db, config=config)
+
+        row = db_conn.execute(
+            "SELECT measured_at, measured_at_ts FROM measurements WHERE id = ?", (row_id,)
+        ).fetchone()
+        parsed = datetime.strptime(row["measured_at"], "%Y-%m-%dT%H:%M:%SZ")
+        assert int(parsed.replace(tzinfo=timezone.utc).timestamp()) == row["measured_at_ts"]
+
+    def test_raw_output_is_stored(self, mem_db, config):
+        """raw_output は measurements_raw に保存される."""
+        row_id = save_error(
+            "Network error",
+            raw_output="stderr output",
+            db_path=mem_db,
+            config=config,
+        )
+        assert get_raw_json(row_id, db_path=mem_db, config=config) == "stderr output"
+
 
 class TestGetHourlyAverages:
     """get_hourly_averages のテストケース."""
 
-    def test_returns_empty_for_no_data(self, initialized_db, config):
+    def test_returns_empty_for_no_data(self, mem_db, config):
         """データがない場合は空リストを返す."""
-        result = get_hourly_averages(db_path=initialized_db, config=config)
+        result = get_hourly_averages(db_path=mem_db, config=config)
         assert result == []
 
-    def test_aggregates_by_hour_and_day(self, initialized_db, config):
+    def test_aggregates_by_hour_and_day(self, mem_db, config):
         """時間帯×曜日で集計される."""
         # 月曜 10時台のデータを2件作成する
         # 2026-02-02 は月曜日
@@ -183,7 +459,7 @@ class TestGetHourlyAverages:
                 measured_at="2026-02-02T10:00:00",
                 comfort_score=80.0,
             ),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
         save_measurement(
@@ -191,87 +467,108 @@ class TestGetHourlyAverages:
                 measured_at="2026-02-02T10:15:00",
                 comfort_score=90.0,
             ),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
 
-        result = get_hourly_averages(days=365, db_path=initialized_db, config=config)
+        result = get_hourly_averages(days=365, db_path=mem_db, config=config)
         assert len(result) == 1
         assert result[0]["day_of_week"] == 0  # 月曜
         assert result[0]["hour"] == 10
         assert result[0]["avg_score"] == 85.0  # (80+90)/2
         assert result[0]["count"] == 2
 
-    def test_excludes_outside_open_hours(self, initialized_db, config):
+    def test_converts_utc_to_local_and_orders_by_weekday(self, mem_db, config):
+        """UTC(Z) の計測日時はローカル時刻に変換され、月曜始まりで並ぶ."""
+        # 2026-02-08T01:30Z は JST 日曜 10:30、2026-02-09T10:00 は月曜 10:00
+        for measured_at in ("2026-02-08T01:30:00Z", "2026-02-09T10:00:00"):
+            save_measurement(
+                _make_measurement(measured_at=measured_at),
+                db_path=mem_db,
+                config=config,
+            )
+
+        result = get_hourly_averages(days=365, db_path=mem_db, config=config)
+        assert [(r["day_of_week"], r["hour"]) for r in result] == [(0, 10), (6, 10)]
+
+    def test_excludes_outside_open_hours(self, mem_db, config):
         """開館時間外のデータは除外される."""
         # 8時台（開館前）のデータ
         save_measurement(
             _make_measurement(measured_at="2026-02-02T08:00:00"),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
         # 22時台（閉館後）のデータ
         save_measurement(
             _make_measurement(measured_at="2026-02-02T22:30:00"),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
 
-        result = get_hourly_averages(days=365, db_path=initialized_db, config=config)
+        result = get_hourly_averages(days=365, db_path=mem_db, config=config)
         assert len(result) == 0
 
-    def test_excludes_error_records(self, initialized_db, config):
+    def test_excludes_error_records(self, mem_db, config):
         """エラーレコードは集計から除外される."""
-        save_error("Network error", db_path=initialized_db, config=config)
-        result = get_hourly_averages(db_path=initialized_db, config=config)
+        save_error("Network error", db_path=mem_db, config=config)
+        result = get_hourly_averages(db_path=mem_db, config=config)
         assert len(result) == 0
 
 
 class TestGetRecentMeasurements:
     """get_recent_measurements のテストケース."""
 
-    def test_returns_empty_for_no_data(self, initialized_db, config):
+    def test_returns_empty_for_no_data(self, mem_db, config):
         """データがない場合は空リストを返す."""
-        result = get_recent_measurements(db_path=initialized_db, config=config)
+        result = get_recent_measurements(db_path=mem_db, config=config)
         assert result == []
 
-    def test_returns_recent_data(self, initialized_db, config):
+    def test_returns_recent_data(self, mem_db, config):
         """直近のデータを返す."""
-        now = datetime.utcnow()
         save_measurement(
-            _make_measurement(measured_at=now.isoformat()),
-            db_path=initialized_db,
+            _make_measurement(measured_at=_iso()),
+            db_path=mem_db,
             config=config,
         )
-        result = get_recent_measurements(hours=1, db_path=initialized_db, config=config)
+        result = get_recent_measurements(hours=1, db_path=mem_db, config=config)
         assert len(result) == 1
 
-    def test_excludes_old_data(self, initialized_db, config):
+    def test_judges_local_time_data_by_epoch(self, mem_db, config):
+        """タイムゾーンなし（カフェのローカル時刻）の measured_at も UTC と同じ基準で判定する."""
+        offset = timedelta(hours=config["cafe"].get("utc_offset_hours", 9))
+        for hours_ago in (0, 2):
+            local_time = NOW + offset - timedelta(hours=hours_ago)
+            save_measurement(
+                _make_measurement(measured_at=local_time.isoformat()),
+                db_path=mem_db,
+                config=config,
+            )
+        # 文字列としては2時間前の行も UTC の境界より後になるが、時刻としては範囲外である
+        result = get_recent_measurements(hours=1, db_path=mem_db, config=config)
+        assert [row["measured_at"] for row in result] == [(NOW + offset).isoformat()]
+
+    def test_excludes_old_data(self, mem_db, config):
         """古いデータは含まれない."""
-        old_time = (datetime.utcnow() - timedelta(hours=48)).isoformat()
+        old_time = _iso(-48)
         save_measurement(
             _make_measurement(measured_at=old_time),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
-        result = get_recent_measurements(hours=24, db_path=initialized_db, config=config)
+        result = get_recent_measurements(hours=24, db_path=mem_db, config=config)
         assert len(result) == 0
 
-    def test_ordered_by_time(self, initialized_db, config):
+    def test_ordered_by_time(self, mem_db, config):
         """計測日時の昇順で返される."""
-        now = datetime.utcnow()
-        times = [
-            (now - timedelta(hours=2)).isoformat(),
-            (now - timedelta(hours=1)).isoformat(),
-            now.isoformat(),
-        ]
+        times = [_iso(-2), _iso(-1), _iso()]
         for t in times:
             save_measurement(
                 _make_measurement(measured_at=t),
-                db_path=initialized_db,
+                db_path=mem_db,
                 config=config,
             )
-        result = get_recent_measurements(hours=24, db_path=initialized_db, config=config)
+        result = get_recent_measurements(hours=24, db_path=mem_db, config=config)
         assert len(result) == 3
         assert result[0]["measured_at"] <= result[1]["measured_at"] <= result[2]["measured_at"]
 
@@ -279,39 +576,50 @@ class TestGetRecentMeasurements:
 class TestCleanupOldData:
     """cleanup_old_data のテストケース."""
 
-    def test_deletes_old_records(self, initialized_db, config):
+    def test_deletes_old_records(self, mem_db, config):
         """保存期間を超えたレコードが削除される."""
         # 100日前のデータ
-        old_time = (datetime.utcnow() - timedelta(days=100)).isoformat()
+        old_time = _iso(-100 * 24)
         save_measurement(
             _make_measurement(measured_at=old_time),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
         # 最近のデータ
         save_measurement(
             _make_measurement(),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
 
         deleted = cleanup_old_data(
-            retention_days=90, db_path=initialized_db, config=config
+            retention_days=90, db_path=mem_db, config=config
         )
         assert deleted == 1
 
         # 残っているのは最近のデータのみ
-        result = get_recent_measurements(hours=24, db_path=initialized_db, config=config)
+        result = get_recent_measurements(hours=24, db_path=mem_db, config=config)
         assert len(result) == 1
 
-    def test_keeps_recent_records(self, initialized_db, config):
+    def test_deletes_raw_json_of_old_records(self, mem_db, config):
+        """削除したレコードの生 JSON も削除される."""
+        old_time = _iso(-100 * 24)
+        row_id = save_measurement(
+            _make_measurement(measured_at=old_time),
+            db_path=mem_db,
+            config=config,
+        )
+        cleanup_old_data(retention_days=90, db_path=mem_db, config=config)
+        assert get_raw_json(row_id, db_path=mem_db, config=config) is None
+
+    def test_keeps_recent_records(self, mem_db, config):
         """保存期間内のレコードは削除されない."""
         save_measurement(
             _make_measurement(),
-            db_path=initialized_db,
+            db_path=mem_db,
             config=config,
         )
         deleted = cleanup_old_data(
-            retention_days=90, db_path=initialized_db, config=config
+            retention_days=90, db_path=mem_db, config=config
         )
         assert deleted == 0
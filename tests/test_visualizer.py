@@ -3,64 +3,183 @@
 実際の画像生成を行い、ファイルが正しく出力されることを検証する。
 """
 
-from datetime import datetime, timedelta
+import copy
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from io import BytesIO
 from pathlib import Path
+from unittest.mock import patch
 
 import numpy as np
 import pytest
+from PIL import Image
 
-from src.config import load_config
-from src.storage import init_db, save_measurement
+from src import visualizer
+from src.storage import close_connections, init_db
 from src.visualizer import (
     generate_heatmap,
     build_trend_summary_text,
+    build_score_explanation_text,
     generate_trend_summary_file,
     _build_heatmap_data,
-    _build_annotation,
+    _averages_to_soa,
+    _filter_today_open_hours_measurements,
+    _resolve_output_path,
 )
 
 
-@pytest.fixture
-def config():
-    """テスト用設定を返す."""
-    return load_config()
+# 過去 N 日 × 開館時間帯（9〜21時）の行を SQLite 側で合成する INSERT ... SELECT
+# 日付は :today（カフェのローカル時刻での当日）から遡り、measured_at はタイムゾーンなしの値として保存する
+# SQLite の 'now' は UTC のため使わない（UTC とローカルで日付がずれる時間帯に1日ずれる）
+# （measured_at_ts は storage._to_epoch と同じく、カフェのローカル時刻とみなして求める）
+_INSERT_SAMPLE_SQL = """
+WITH RECURSIVE
+    d(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM d WHERE n + 1 < :days),
+    h(n) AS (SELECT 9 UNION ALL SELECT n + 1 FROM h WHERE n < 21),
+    s(measured_at, day_offset, hour) AS (
+        SELECT strftime('%Y-%m-%dT%H:%M:%S', :today,
+                        '-' || d.n || ' days', '+' || h.n || ' hours'),
+               d.n, h.n
+        FROM d, h
+    )
+INSERT INTO measurements (
+    measured_at, measured_at_ts, status, download_mbps, upload_mbps,
+    ping_ms, jitter_ms, comfort_score
+)
+SELECT measured_at,
+       CAST(strftime('%s', measured_at) AS INTEGER) - :utc_offset_hours * 3600,
+       'ok',
+       50.0 + hour,
+       25.0 + hour * 0.5,
+       20.0 - hour * 0.3,
+       5.0,
+       -- 時間帯によって少しスコアを変動させる
+       MIN(60.0 + (hour - 9) * 3.0 + day_offset * 0.5, 100.0)
+FROM s
+"""
+
+
+def _insert_sample_data(db_path, config, days=7):
+    """テスト用のサンプルデータを挿入するヘルパー.
+
+    過去 N 日間、各開館時間帯に1件ずつデータを挿入する。
+    行は Python で組み立てず、1つの INSERT ... SELECT で SQLite 側に合成させる。
+    基準日は設定の UTC オフセットで求めた、カフェのローカル時刻での当日とする。
+    """
+    if days <= 0:
+        return
+    utc_offset_hours = config["cafe"].get("utc_offset_hours", 9)
+    today = datetime.now(timezone(timedelta(hours=utc_offset_hours))).date()
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                _INSERT_SAMPLE_SQL,
+                {
+                    "days": days,
+                    "today": today.isoformat(),
+                    "utc_offset_hours": utc_offset_hours,
+                },
+            )
+    finally:
+        conn.close()
 
 
 @pytest.fixture
-def db_path(tmp_path):
-    """テスト用の一時データベースパスを返す."""
-    return tmp_path / "test.db"
+def fake_render():
+    """PNG のラスタライズ（canvas.draw）を省き、1画素の画像を書き出させる.
+
+    出力パスや呼び出し回数だけを確認し、画像の内容を確認しないテストで使う。
+    PNG のエンコードと書き込みは本物の経路を通る。
+    """
+    pixel = np.zeros((1, 1, 4), dtype=np.uint8)
+    with patch.object(visualizer, "_render_png_buffer", return_value=pixel) as render:
+        yield render
 
 
 @pytest.fixture
-def initialized_db(db_path, config):
-    """初期化済みのデータベースパスを返す."""
-    init_db(db_path=db_path, config=config)
-    return db_path
+def los_angeles_timezone(monkeypatch):
+    """ローカルタイムゾーンを America/Los_Angeles に切り替える（UTC との日付ずれを再現するため）."""
+    monkeypatch.setenv("TZ", "America/Los_Angeles")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+class TestFilterTodayOpenHoursMeasurements:
+    """_filter_today_open_hours_measurements のテストケース."""
+
+    def test_keeps_today_open_hours_only(self):
+        """当日の開館時間内のデータのみが残る."""
+        today = datetime.now().replace(minute=0, second=0, microsecond=0)
+        rows = [
+            {"measured_at": today.replace(hour=10).isoformat()},
+            {"measured_at": today.replace(hour=8).isoformat()},
+            {"measured_at": today.replace(hour=22).isoformat()},
+            {"measured_at": (today.replace(hour=10) - timedelta(days=1)).isoformat()},
+        ]
+        filtered = _filter_today_open_hours_measurements(rows, open_hour=9, close_hour=22)
+        assert filtered == [rows[0]]
+
+    def test_utc_value_on_other_date_is_converted(self, los_angeles_timezone):
+        """UTC 表記では翌日付でも、ローカル時刻で当日なら残る."""
+        local_8pm = datetime.now().astimezone().replace(hour=20, minute=0, second=0, microsecond=0)
+        # 太平洋時間の 20:00 は UTC では翌日の 03:00 または 04:00 になる
+        utc_value = local_8pm.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        assert utc_value[:10] != local_8pm.date().isoformat()
+
+        rows = [{"measured_at": utc_value}]
+        filtered = _filter_today_open_hours_measurements(rows, open_hour=9, close_hour=22)
+        assert filtered == rows
+
+    def test_uses_given_today(self):
+        """today を指定した場合は、その日付を当日として絞り込む."""
+        rows = [
+            {"measured_at": "2026-01-05T10:00:00"},
+            {"measured_at": "2026-01-06T10:00:00"},
+        ]
+        filtered = _filter_today_open_hours_measurements(
+            rows, open_hour=9, close_hour=22, today=date(2026, 1, 5)
+        )
+        assert filtered == [rows[0]]
 
 
-def _insert_sample_data(db_path, config, days=7):
-    """テスト用のサンプルデータを挿入するヘルパー.
+class TestAveragesToSoa:
+    """_averages_to_soa のテストケース."""
 
-    過去 N 日間、各開館時間帯に1件ずつデータを挿入する。
-    """
-    now = datetime.utcnow()
-    for day_offset in range(days):
-        dt = now - timedelta(days=day_offset)
-        for hour in range(9, 22):
-            measured_at = dt.replace(hour=hour, minute=0, second=0).isoformat()
-            # 時間帯によって少しスコアを変動させる
-            score = 60.0 + (hour - 9) * 3.0 + day_offset * 0.5
-            score = min(score, 100.0)
-            data = {
-                "measured_at": measured_at,
-                "download_mbps": 50.0 + hour,
-                "upload_mbps": 25.0 + hour * 0.5,
-                "ping_ms": 20.0 - hour * 0.3,
-                "jitter_ms": 5.0,
-                "comfort_score": score,
-            }
-            save_measurement(data, db_path=db_path, config=config)
+    def test_converts_to_column_arrays(self):
+        """各列が同じ順序の NumPy 配列になる."""
+        averages = [
+            {"day_of_week": 0, "hour": 10, "avg_score": 85.0, "count": 5},
+            {"day_of_week": 4, "hour": 15, "avg_score": 72.3, "count": 3},
+        ]
+        arrays = _averages_to_soa(averages)
+        assert arrays.day_of_week.tolist() == [0, 4]
+        assert arrays.hour.tolist() == [10, 15]
+        assert arrays.avg_score.tolist() == [85.0, 72.3]
+        assert arrays.day_of_week.dtype == np.int8
+        assert arrays.hour.dtype == np.int8
+
+    def test_converted_value_is_returned_as_is(self):
+        """変換済みの値を渡すとそのまま返る."""
+        arrays = _averages_to_soa([])
+        assert _averages_to_soa(arrays) is arrays
+        assert arrays.hour.size == 0
+
+    def test_same_heatmap_from_list_and_arrays(self, config):
+        """辞書のリストと変換済みの配列から同じヒートマップデータを構築する."""
+        averages = [
+            {"day_of_week": 1, "hour": 9, "avg_score": 40.0, "count": 1},
+            {"day_of_week": 6, "hour": 21, "avg_score": 99.5, "count": 2},
+        ]
+        days_of_week = config["visualization"]["days_of_week"]
+        from_list, _, _, _ = _build_heatmap_data(averages, 9, 22, days_of_week)
+        from_arrays, _, _, _ = _build_heatmap_data(
+            _averages_to_soa(averages), 9, 22, days_of_week
+        )
+        np.testing.assert_array_equal(from_list, from_arrays)
 
 
 class TestBuildHeatmapData:
@@ -98,6 +217,36 @@ class TestBuildHeatmapData:
         # それ以外は欠損
         assert mask[0, 0]  # 月曜9時
 
+    def test_out_of_range_entries_are_ignored(self, config):
+        """範囲外の曜日・時間帯のデータは無視される."""
+        averages = [
+            {"day_of_week": 7, "hour": 10, "avg_score": 50.0, "count": 1},
+            {"day_of_week": 0, "hour": 8, "avg_score": 50.0, "count": 1},
+            {"day_of_week": 0, "hour": 22, "avg_score": 50.0, "count": 1},
+            {"day_of_week": 6, "hour": 21, "avg_score": 64.0, "count": 1},
+        ]
+        data, mask, _, _ = _build_heatmap_data(
+            averages=averages,
+            open_hour=9,
+            close_hour=22,
+            days_of_week=config["visualization"]["days_of_week"],
+        )
+        assert int((~mask).sum()) == 1
+        assert data[6, 12] == 64.0
+
+    def test_data_is_float32(self, config):
+        """スコア配列は float32 で、欠損は NaN で表せる."""
+        averages = [{"day_of_week": 2, "hour": 12, "avg_score": 77.5, "count": 2}]
+        data, mask, _, _ = _build_heatmap_data(
+            averages=averages,
+            open_hour=9,
+            close_hour=22,
+            days_of_week=config["visualization"]["days_of_week"],
+        )
+        assert data.dtype == np.float32
+        assert data[2, 3] == 77.5
+        assert int((~mask).sum()) == 1
+
     def test_labels(self, config):
         """ラベルが正しく生成される."""
         _, _, x_labels, y_labels = _build_heatmap_data(
@@ -112,29 +261,61 @@ class TestBuildHeatmapData:
         assert y_labels == ["月", "火", "水", "木", "金", "土", "日"]
 
 
-class TestBuildAnnotation:
-    """_build_annotation のテストケース."""
+class TestBuildScoreExplanationText:
+    """build_score_explanation_text のテストケース."""
 
-    def test_with_data_and_missing(self):
-        """データありと欠損のアノテーションを確認する."""
-        data = np.array([[85.3, np.nan], [np.nan, 72.0]])
-        mask = np.isnan(data)
-        annot = _build_annotation(data, mask)
-        assert annot[0][0] == "85"
-        assert annot[0][1] == "-"
-        assert annot[1][0] == "-"
-        assert annot[1][1] == "72"
+    def test_lists_labels_in_descending_order(self, config):
+        """評価帯はスコアの高い順に並ぶ."""
+        text = build_score_explanation_text(config=config)
+        assert "DL 35% / UL 20% / Ping 30% / Jitter 15%" in text
+        band_lines = [line for line in text.splitlines() if line.startswith("  ")]
+        assert band_lines[0].startswith("  90-100:")
+        assert band_lines[-1].startswith("  0-49:")
+
+    def test_reflects_changed_config(self, config):
+        """重みや評価帯を変えた設定では、キャッシュ済みの結果を返さない."""
+        before = build_score_explanation_text(config=config)
+        modified = copy.deepcopy(config)
+        modified["scoring"]["weights"]["download"] = 0.5
+        modified["scoring"]["labels"][0]["label"] = "最高"
+        after = build_score_explanation_text(config=modified)
+        assert after != before
+        assert "DL 50%" in after
+        assert "最高" in after
 
 
 class TestGenerateHeatmap:
-    """generate_heatmap のテストケース."""
+    """generate_heatmap のテストケース.
+
+    実際に画像をラスタライズするテストは他より桁違いに遅いため、slow マーカーを付ける。
+    画像の内容を確認しないテストは fake_render でラスタライズを省き、既定の実行に含める。
+    """
 
-    def test_generates_image_with_no_data(self, tmp_path, initialized_db, config):
-        """データなしでも画像が生成される."""
-        output = tmp_path / "test_output.png"
+    @pytest.mark.slow
+    @pytest.mark.parametrize(
+        ("data_days", "relative_output", "summary_text"),
+        [
+            pytest.param(0, "test_output.png", None, id="no_data"),
+            pytest.param(3, "test_with_data.png", None, id="with_data"),
+            pytest.param(0, "nested/dir/output.png", None, id="creates_output_directory"),
+            pytest.param(0, "with_summary.png", "テストサマリ\n2行目", id="custom_summary"),
+        ],
+    )
+    def test_generates_png(
+        self, tmp_path, initialized_db, config, data_days, relative_output, summary_text
+    ):
+        """データの有無・出力先・サマリ指定によらず PNG 画像が生成される.
+
+        出力ディレクトリが存在しない場合は自動作成される。
+        """
+        if data_days:
+            _insert_sample_data(initialized_db, config, days=data_days)
+
+        output = tmp_path / relative_output
         result = generate_heatmap(
             output_path=output,
             days=28,
+            summary_text=summary_text,
             config=config,
             db_path=initialized_db,
         )
@@ -143,61 +324,240 @@ class TestGenerateHeatmap:
         # PNG ファイルであることを確認（マジックバイト）
         with open(output, "rb") as f:
             assert f.read(4) == b"\x89PNG"
-
-    def test_generates_image_with_data(self, tmp_path, initialized_db, config):
-        """データありで画像が正しく生成される."""
-        _insert_sample_data(initialized_db, config, days=3)
-
-        output = tmp_path / "test_with_data.png"
-        result = generate_heatmap(
-            output_path=output,
-            days=28,
-            config=config,
-            db_path=initialized_db,
-        )
-        assert result == output
-        assert output.exists()
         # ファイルサイズが適切であることを確認（空画像より大きい）
         assert output.stat().st_size > 1000
 
-    def test_default_output_path(self, initialized_db, config, tmp_path):
+    def test_default_output_path(self, initialized_db, mutable_config, tmp_path, fake_render):
         """出力パス省略時に assets/YYYY-MM-DD.png が生成される."""
-        config["visualization"]["assets_dir"] = str(tmp_path / "assets")
+        mutable_config["visualization"]["assets_dir"] = str(tmp_path / "assets")
         result = generate_heatmap(
-            config=config,
+            config=mutable_config,
             db_path=initialized_db,
         )
         today = datetime.now().strftime("%Y-%m-%d")
         assert result.name == f"{today}.png"
         assert result.exists()
 
-    def test_creates_output_directory(self, tmp_path, initialized_db, config):
-        """出力ディレクトリが存在しない場合に自動作成される."""
-        output = tmp_path / "nested" / "dir" / "output.png"
+    @pytest.mark.slow
+    def test_reuses_figure_between_calls(self, tmp_path, initialized_db, config):
+        """2回目以降は同じ Figure を再利用し、前回の描画内容を持ち越さない."""
+        _insert_sample_data(initialized_db, config, days=3)
+        empty_db = tmp_path / "empty.db"
+        init_db(db_path=empty_db, config=config)
+
+        first = generate_heatmap(
+            output_path=tmp_path / "first.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=empty_db,
+        )
+        fig = visualizer._FIG[0]
+        generate_heatmap(
+            output_path=tmp_path / "with_data.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=initialized_db,
+        )
+        second = generate_heatmap(
+            output_path=tmp_path / "second.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=empty_db,
+        )
+        close_connections(empty_db)
+        assert visualizer._FIG[0] is fig
+        assert first.read_bytes() == second.read_bytes()
+
+    def test_reused_figure_drops_previous_artists(
+        self, tmp_path, initialized_db, config, fake_render
+    ):
+        """Figure を再利用しても、前回描いたセルの値や折れ線を持ち越さない."""
+        _insert_sample_data(initialized_db, config, days=3)
+        generate_heatmap(
+            output_path=tmp_path / "with_data.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=initialized_db,
+        )
+        fig = visualizer._FIG[0]
+        cell_count = len(visualizer._FIG.ax_heatmap.texts)
+
+        empty_db = tmp_path / "empty.db"
+        init_db(db_path=empty_db, config=config)
+        generate_heatmap(
+            output_path=tmp_path / "empty.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=empty_db,
+        )
+        close_connections(empty_db)
+        assert visualizer._FIG[0] is fig
+        texts = [text.get_text() for text in visualizer._FIG.ax_heatmap.texts]
+        assert len(texts) == cell_count
+        assert set(texts) == {"-"}
+        assert len(visualizer._FIG.ax_heatmap.collections) == 1
+
+    def test_background_save_without_wait(self, tmp_path, initialized_db, config, fake_render):
+        """wait=False の場合もバックグラウンドで PNG が書き出される."""
+        output = tmp_path / "background.png"
         result = generate_heatmap(
             output_path=output,
+            summary_text="サマリ",
             config=config,
             db_path=initialized_db,
+            wait=False,
         )
-        assert result.exists()
+        assert result == output
+        # 保存スレッドは1本のため、後から投入した処理の完了で先行する書き込みの完了を待てる
+        visualizer._SAVE_POOL.submit(lambda: None).result()
+        with open(output, "rb") as f:
+            assert f.read(4) == b"\x89PNG"
 
-    def test_embeds_custom_summary_text(self, tmp_path, initialized_db, config):
-        """カスタムサマリ文字列を指定しても画像生成できる."""
-        output = tmp_path / "with_summary.png"
+    @pytest.mark.slow
+    def test_non_png_output_uses_savefig(self, tmp_path, initialized_db, config):
+        """PNG 以外の拡張子は matplotlib で同期的に保存される."""
+        output = tmp_path / "report.pdf"
         result = generate_heatmap(
             output_path=output,
-            summary_text="テストサマリ\n2行目",
+            summary_text="サマリ",
             config=config,
             db_path=initialized_db,
         )
-        assert result.exists()
+        with open(result, "rb") as f:
+            assert f.read(4) == b"%PDF"
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("dpi", [100, 150])
+    def test_png_buffer_matches_tight_savefig_size(self, tmp_path, initialized_db, config, dpi):
+        """PNG の切り出し範囲は savefig(bbox_inches="tight") と同じ画素数になる."""
+        _insert_sample_data(initialized_db, config, days=1)
+        generate_heatmap(
+            output_path=tmp_path / "report.pdf",
+            summary_text="サマリ",
+            config=config,
+            db_path=initialized_db,
+        )
+        fig = visualizer._FIG.fig
+        expected = BytesIO()
+        fig.savefig(expected, format="png", dpi=dpi, bbox_inches="tight")
+        with Image.open(expected) as image:
+            expected_width, expected_height = image.size
+
+        buf = visualizer._render_png_buffer(fig, dpi)
+        assert buf.shape == (expected_height, expected_width, 4)
+
+    def test_heatmap_mesh_is_rasterized(self, tmp_path, initialized_db, config, fake_render):
+        """ヒートマップのセル（QuadMesh）はラスタ化して描画される."""
+        _insert_sample_data(initialized_db, config, days=1)
+        generate_heatmap(
+            output_path=tmp_path / "raster.png",
+            summary_text="サマリ",
+            config=config,
+            db_path=initialized_db,
+        )
+        mesh = visualizer._FIG.ax_heatmap.collections[0]
+        assert mesh.get_rasterized()
+
+    def test_cell_annotations_show_scores_and_dashes(self, tmp_path, config, fake_render):
+        """データありのセルは f"{x:.0f}" のスコア、欠損セルは "-" だけが1つずつ描かれる."""
+        averages = [
+            {"day_of_week": 0, "hour": 9, "avg_score": 85.3, "count": 1},
+            {"day_of_week": 2, "hour": 15, "avg_score": 49.6, "count": 1},
+            {"day_of_week": 6, "hour": 21, "avg_score": 100.0, "count": 1},
+        ]
+        with patch("src.visualizer.get_hourly_averages", return_value=averages), patch(
+            "src.visualizer.get_recent_measurements", return_value=[]
+        ):
+            generate_heatmap(
+                output_path=tmp_path / "annot.png", summary_text="サマリ", config=config
+            )
+
+        data, mask, _, _ = _build_heatmap_data(
+            averages,
+            config["cafe"]["open_hour"],
+            config["cafe"]["close_hour"],
+            config["visualization"]["days_of_week"],
+        )
+        expected = {
+            (j + 0.5, i + 0.5): "-" if mask[i, j] else f"{data[i, j]:.0f}"
+            for i in range(data.shape[0])
+            for j in range(data.shape[1])
+        }
+        texts = visualizer._FIG.ax_heatmap.texts
+        cells = {tuple(text.get_position()): text.get_text() for text in texts}
+        assert len(texts) == data.size
+        assert cells == expected
+        assert cells[(0.5, 0.5)] == "85"
+        assert cells[(6.5, 2.5)] == "50"
+
+    def test_skips_rendering_when_inputs_unchanged(
+        self, tmp_path, initialized_db, config, fake_render
+    ):
+        """入力が前回と同じで画像が残っていれば、描画を省略して同じパスを返す."""
+        _insert_sample_data(initialized_db, config, days=1)
+        output = tmp_path / "cached.png"
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        fake_render.reset_mock()
+
+        result = generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        assert result == output
+        fake_render.assert_not_called()
+
+        # 画像が消えている場合は作り直す
+        output.unlink()
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        assert fake_render.call_count == 1
+        assert output.exists()
+
+    def test_hash_is_embedded_in_png(self, tmp_path, initialized_db, config, fake_render):
+        """入力ハッシュは PNG のテキストチャンクに埋め込まれ、別ファイルは作らない."""
+        output = tmp_path / "embedded.png"
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        with Image.open(output) as image:
+            assert image.info[visualizer._INPUT_HASH_KEY]
+        assert list(tmp_path.glob("embedded.png*")) == [output]
+        fake_render.reset_mock()
+
+        # ハッシュを持たない PNG に置き換えられていれば（前回の結果が分からなければ）作り直す
+        Image.new("RGBA", (1, 1)).save(output)
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        assert fake_render.call_count == 1
+
+    def test_rerenders_when_inputs_change(self, tmp_path, initialized_db, config, fake_render):
+        """データやサマリが変わった場合は画像を作り直す."""
+        output = tmp_path / "changed.png"
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        fake_render.reset_mock()
+
+        _insert_sample_data(initialized_db, config, days=1)
+        generate_heatmap(
+            output_path=output, summary_text="サマリ", config=config, db_path=initialized_db
+        )
+        generate_heatmap(
+            output_path=output, summary_text="別のサマリ", config=config, db_path=initialized_db
+        )
+        assert fake_render.call_count == 2
 
-    def test_hourly_default_output_path(self, initialized_db, config, tmp_path):
+    def test_hourly_default_output_path(
+        self, initialized_db, mutable_config, tmp_path, fake_render
+    ):
         """hourly 指定時に YYYY-MM-DD_HH00.png が生成される."""
-        config["visualization"]["assets_dir"] = str(tmp_path / "assets")
+        mutable_config["visualization"]["assets_dir"] = str(tmp_path / "assets")
         result = generate_heatmap(
             filename_granularity="hourly",
-            config=config,
+            config=mutable_config,
             db_path=initialized_db,
         )
         assert result.exists()
@@ -205,6 +565,15 @@ class TestGenerateHeatmap:
         assert len(result.stem.split("_")) == 2
         assert result.name.endswith("00.png")
 
+    def test_default_output_path_uses_given_now(self, mutable_config, tmp_path):
+        """now を指定した場合は、その日時からファイル名を決める."""
+        mutable_config["visualization"]["assets_dir"] = str(tmp_path / "assets")
+        now = datetime(2026, 1, 5, 14, 30)
+        hourly = _resolve_output_path(mutable_config, None, "hourly", now=now)
+        daily = _resolve_output_path(mutable_config, None, "daily", now=now)
+        assert hourly.name == "2026-01-05_1400.png"
+        assert daily.name == "2026-01-05.png"
+
 
 class TestTrendSummary:
     """傾向サマリ生成のテストケース."""
@@ -221,6 +590,45 @@ class TestTrendSummary:
         assert "観測カバレッジ" in summary
         assert "良好な時間帯" in summary
 
+    def test_prefetched_data_skips_queries(self, config):
+        """取得済みの集計結果を渡した場合は DB を参照しない."""
+        averages = [
+            {"day_of_week": 0, "hour": 10, "avg_score": 85.0, "count": 5},
+            {"day_of_week": 1, "hour": 15, "avg_score": 40.0, "count": 2},
+        ]
+        with patch("src.visualizer.get_hourly_averages") as mock_averages, patch(
+            "src.visualizer.get_recent_measurements"
+        ) as mock_recent:
+            summary = build_trend_summary_text(
+                days=7,
+                config=config,
+                averages=averages,
+                recent_48h=[],
+            )
+        mock_averages.assert_not_called()
+        mock_recent.assert_not_called()
+        assert "10時台（平均 85.0）" in summary
+        assert "15時台（平均 40.0）" in summary
+
+    def test_short_term_trend_from_prefetched_rows(self, config):
+        """直近24時間と前24時間の平均差分がサマリに入る."""
+        recent_48h = [
+            {"measured_at": "2026-02-01T10:00:00Z", "comfort_score": 60.0},
+            {"measured_at": "2026-02-01T12:00:00Z", "comfort_score": 70.0},
+            {"measured_at": "2026-02-02T11:00:00Z", "comfort_score": 80.0},
+            {"measured_at": "2026-02-02T13:00:00Z", "comfort_score": None},
+            {"measured_at": "2026-02-02T13:00:00Z", "comfort_score": 90.0},
+        ]
+        summary = build_trend_summary_text(
+            days=7,
+            config=config,
+            averages=[],
+            recent_48h=recent_48h,
+        )
+        # 基準は最新の 02-02 13:00、境界は 02-01 13:00
+        assert "改善（直近24h: 85.0, 前24h: 65.0, 差分: +20.0）" in summary
+        assert "良好な時間帯: データ不足" in summary
+
     def test_generate_summary_file(self, tmp_path, initialized_db, config):
         """サマリファイルを生成できる."""
         _insert_sample_data(initialized_db, config, days=2)